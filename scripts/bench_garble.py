@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: batched translate-based garble detectors (garble_scores)
+vs the original per-char loops, on the real cell lines of the CM/GO/PED PDFs.
+
+Cell text comes from the stage-1 cache (scripts/.pdf_cache), so run
+parse_pdfs.py all once first; missing entries are extracted and cached.
+
+Usage: python bench_garble.py [--rounds N] [--no-cache] [--rebuild-cache]
+"""
+import argparse
+import sys
+import time
+
+from parse_pdfs import (MATERIA_PATHS, EXTRACTOR_VERSION, materia_pdf_paths, extract_cells,
+                        cells_to_json, garble_scores, garbled_digit_flags)
+from pdf_cache import PdfCache, add_cache_args
+
+
+# ── Reference: per-char implementations the batch API replaced ───────────
+def reference_is_garbled_digit(text):
+    if len(text) < 6:
+        return False
+
+    def _count_transitions(s):
+        transitions = 0
+        prev_type = None
+        relevant = 0
+        for c in s:
+            if c.isdigit():
+                cur = 'd'
+            elif c.isalpha():
+                cur = 'a'
+            else:
+                continue
+            relevant += 1
+            if prev_type and cur != prev_type:
+                transitions += 1
+            prev_type = cur
+        return transitions, relevant
+
+    trans_first, rel_first = _count_transitions(text[:14])
+    if rel_first >= 5 and trans_first >= 3:
+        return True
+    digit_count = sum(1 for c in text if c.isdigit())
+    if digit_count < 4:
+        return False
+    trans_all, rel_all = _count_transitions(text)
+    return rel_all >= 8 and trans_all / rel_all >= 0.25
+
+
+def reference_is_garbled_case(text):
+    alpha = [c for c in text if c.isalpha()]
+    if len(alpha) < 8:
+        return False
+    changes = sum(1 for i in range(1, len(alpha)) if alpha[i].isupper() != alpha[i-1].isupper())
+    return changes / len(alpha) > 0.30
+
+
+def corpus_lines(cache):
+    lines = []
+    for mid in MATERIA_PATHS:
+        for _g, path in materia_pdf_paths(mid):
+            if path is None:
+                continue
+            rows = cache.fetch(path, "cells:chars", lambda: cells_to_json(extract_cells(path)))
+            for row in rows:
+                lines.extend(row[3].split('\n'))
+    return lines
+
+
+def best_of(rounds, fn):
+    best = None
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--rounds', type=int, default=20, help='Timing rounds (best is reported)')
+    add_cache_args(parser)
+    args = parser.parse_args()
+
+    cache = PdfCache.from_args(args, EXTRACTOR_VERSION)
+    lines = corpus_lines(cache)
+    print(f"{len(lines)} cell lines ({len(set(lines))} distinct)", file=sys.stderr)
+
+    expected = [(reference_is_garbled_digit(l), reference_is_garbled_case(l)) for l in lines]
+    if garble_scores(lines) != expected:
+        print("  [ERROR] garble_scores disagrees with the per-char reference", file=sys.stderr)
+        sys.exit(1)
+    print(f"  decisions match: {sum(d for d, _ in expected)} digit-garbled, "
+          f"{sum(c for _, c in expected)} case-garbled", file=sys.stderr)
+
+    timings = [
+        ("digit: per-char loop", lambda: [reference_is_garbled_digit(l) for l in lines]),
+        ("digit: translate, no dedup", lambda: garbled_digit_flags.__wrapped__(lines)),
+        ("digit: batched translate", lambda: garbled_digit_flags(lines)),
+        ("both:  per-char loops", lambda: [(reference_is_garbled_digit(l), reference_is_garbled_case(l))
+                                           for l in lines]),
+        ("both:  garble_scores", lambda: garble_scores(lines)),
+    ]
+    results = {}
+    for label, fn in timings:
+        results[label] = best_of(args.rounds, fn)
+        print(f"  {label:26s} {results[label] * 1000:8.2f} ms", file=sys.stderr)
+    for old, new in ((0, 1), (0, 2), (3, 4)):
+        old, new = timings[old][0], timings[new][0]
+        print(f"  speed-up {new}: {results[old] / results[new]:.1f}x", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
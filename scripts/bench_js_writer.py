@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Peak-memory benchmark: streaming the src/data modules (write_js /
+write_modules, what generate_js.main and parse_cc.main now do) vs rendering
+every module to one string first, on all_data.json (CM/GO/PED) and
+cc_data.json (CC).
+
+Peaks are tracemalloc's, counted from after the data is loaded, so they are
+the transient allocations of hashing + writing the modules (to os.devnull).
+--scale N repeats every group N times to stand in for more modules/semesters
+per run.
+
+Usage: python bench_js_writer.py [--rounds N] [--scale N]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from generate_js import BASE_DIR, FORMATS, content_digest, materia_modules, module_text, write_js
+from pdf_cache import format_bytes
+
+SOURCES = (("generate_js", "all_data.json", ("cm", "go", "ped")),
+           ("parse_cc", "cc_data.json", ("cc",)))
+LAYOUTS = ("hub", "single")
+
+
+def load_groups(name, materias, scale):
+    with open(os.path.join(BASE_DIR, "scripts", name), encoding="utf-8") as f:
+        data = json.load(f)
+    return {mid: {str(int(g) + 100 * k): weeks for k in range(scale) for g, weeks in data[mid].items()}
+            for mid in materias if mid in data}
+
+
+def render_in_memory(modules):
+    """The previous path: every module rendered to a string, then encoded, hashed and written."""
+    texts = {path: module_text(module) for path, module in modules.items()}
+    with open(os.devnull, "wb") as f:
+        for text in texts.values():
+            data = text.encode("utf-8")
+            content_digest(data)
+            f.write(data)
+
+
+def render_streaming(modules):
+    """write_modules' path (stream_module): each module rendered once, hashed and written in chunks."""
+    with open(os.devnull, "wb") as f:
+        for module in modules.values():
+            h = hashlib.sha256()
+
+            def sink(chunk):
+                data = chunk.encode("utf-8")
+                h.update(data)
+                f.write(data)
+            write_js(module, sink)
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def best_of(rounds, fn):
+    best = None
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--rounds', type=int, default=5, help='Timing rounds (best is reported)')
+    parser.add_argument('--scale', type=int, default=1, help='Repeat every group N times')
+    args = parser.parse_args()
+
+    print(f"  {'path':11s} {'format':8s} {'layout':6s} {'modules':>7s} {'output':>9s} "
+          f"{'in-memory peak':>14s} {'streaming peak':>14s} {'ratio':>6s} {'ms (mem/stream)':>16s}",
+          file=sys.stderr)
+    for label, name, materias in SOURCES:
+        data = load_groups(name, materias, args.scale)
+        for fmt in FORMATS:
+            for layout in LAYOUTS:
+                modules = {}
+                for mid, groups in data.items():
+                    modules.update(materia_modules(mid, groups, fmt, layout)[0])
+                size = sum(len(module_text(m).encode("utf-8")) for m in modules.values())
+                mem = peak_memory(lambda: render_in_memory(modules))
+                stream = peak_memory(lambda: render_streaming(modules))
+                t_mem = best_of(args.rounds, lambda: render_in_memory(modules))
+                t_stream = best_of(args.rounds, lambda: render_streaming(modules))
+                print(f"  {label:11s} {fmt:8s} {layout:6s} {len(modules):7d} {format_bytes(size):>9s} "
+                      f"{format_bytes(mem):>14s} {format_bytes(stream):>14s} {mem / stream:5.1f}x "
+                      f"{t_mem * 1000:7.1f}/{t_stream * 1000:<7.1f}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
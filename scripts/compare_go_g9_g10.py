@@ -1,4 +1,17 @@
+import argparse
+import os
+import sys
+
 import pdfplumber
+from pdf_cache import PdfCache, add_cache_args
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+parser = argparse.ArgumentParser()
+add_cache_args(parser)
+args = parser.parse_args()
+# Raw page text only depends on the PDF bytes and the pdfplumber version
+cache = PdfCache.from_args(args, f"pdfplumber-{pdfplumber.__version__}")
 
 def get_text(path):
     pages = []
@@ -7,8 +20,11 @@ def get_text(path):
             pages.append(page.extract_text() or "")
     return pages
 
-g9_pages = get_text('D:/CronoINTERNATO/cronoped/go_g9.pdf')
-g10_pages = get_text('D:/CronoINTERNATO/cronoped/go_g10.pdf')
+def get_text_cached(path):
+    return cache.fetch(path, "page_text", lambda: get_text(path))
+
+g9_pages = get_text_cached(os.path.join(BASE_DIR, 'go_g9.pdf'))
+g10_pages = get_text_cached(os.path.join(BASE_DIR, 'go_g10.pdf'))
 
 print("G9 pages:", len(g9_pages))
 for i, p in enumerate(g9_pages):
@@ -20,3 +36,5 @@ print("G10 pages:", len(g10_pages))
 for i, p in enumerate(g10_pages):
     print(f"=== G10 PAGE {i+1} ===")
     print(p)
+
+print(cache.summary(), file=sys.stderr)
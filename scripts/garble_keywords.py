@@ -0,0 +1,89 @@
+"""
+Literal keywords and garble signatures probed by the CC/CM/GO/PED parsers,
+compiled into one Aho–Corasick automaton.
+
+parse_pdfs.parse_cell_text and the cc_rules.json rules applied by
+parse_cc.postprocess_cc (postprocess_rules.py) both scan their text once
+and decide their rules from the hit set:
+    hits = KEYWORDS.scan(title.upper())
+    if 'EPCR' in hits: ...
+Add new signatures to PATTERNS; the automaton is rebuilt at import.
+"""
+
+PATTERNS = {
+    # parse_cell_text shortcut rules, matched against the upper-cased cell text
+    "cell": (
+        "FERIADO", "HORÁRIO VERDE", "HORARIO VERDE", "SIMULADO NACIONAL", "MEDCOF",
+        "SIMULADO GERAL", "RAL", "PROVA", "MÓDULO", "MODULO",
+        "CONSOLIDAÇÃO", "CONSOLIDACAO", "CONSOLID", "PERFORMA", "PERFORMANCE", "EM CASA",
+        "ENMSO CLIADSAA", "APETIRVFIO", "PLANTÃO", "PLANTAO", "HUV",
+        "PRÁTICA DE DIAGNÓSTICO", "PRATICA DE DIAGNOSTICO", "IMAGEM", "DIAGNÓ",
+        "FRO", "ERIATRIA",
+    ),
+    # parse_cell_text activity type, matched against the lower-cased title
+    "title": (
+        "enfermaria", "ambu", "aloj", "c. de simulaç", "centro de simula",
+        "saúde mental", "saude mental",
+    ),
+    # cc_rules.json garble signatures ("all"/"any"/"none"), matched against the upper-cased CC title
+    "cc": (
+        "CPRE", "IMUL", "SCIM", "SCAELN", "CIR", "EPCR",
+        "ADMR", "CULL", "FBÁU", "FÁUBI", "HBUUL", "BLAIO", "APRMOFB", "ALIN",
+        "ESMOL", "EM CASA", "SIMUL", "NOAF", "MEDOC", "ADEDOC",
+        "SPEROSF", "ILSO", "TPRRAO", "ROSSANO", "PCRA", "MARCATI", "MANUELA",
+        "VASCULAR", "VAIGV", "PVAI", "HOTEL",
+    ),
+}
+
+
+class KeywordAutomaton:
+    """
+    Aho–Corasick automaton over a fixed keyword set. scan(text) returns every
+    keyword occurring in text (overlaps included), i.e.
+    {k for k in keywords if k in text}, in a single pass over text.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = frozenset(keywords)
+        goto = [{}]
+        out = [set()]
+        for kw in self.keywords:
+            state = 0
+            for ch in kw:
+                if ch not in goto[state]:
+                    goto.append({})
+                    out.append(set())
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            out[state].add(kw)
+
+        # Breadth-first: fail links, then a full transition table per state so
+        # scan() never has to follow fail links.
+        fail = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = list(goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            out[state] |= out[fail[state]]
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0)
+                queue.append(nxt)
+        self._delta = delta
+        self._out = [frozenset(o) for o in out]
+
+    def scan(self, text):
+        delta, out = self._delta, self._out
+        hits = set()
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                hits |= out[state]
+        return hits
+
+
+KEYWORDS = KeywordAutomaton(kw for group in PATTERNS.values() for kw in group)
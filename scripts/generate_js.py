@@ -1,16 +1,61 @@
 #!/usr/bin/env python3
 """
 Generate JS data modules from parsed schedule JSON.
-Creates src/data/{cm,go,ped}.js with weeksByGroup exports.
+Creates the src/data/{cm,go,ped}.js hubs and their {mid}G{n}.js group modules
+(--layout lazy: hubs with loadGroup(g); --layout single: one module each).
+Activities carry a precomputed effectiveType and weeks a day/turno "slots"
+index, so src/scheduleData.js preProcess skips inferType at import
+(--no-precompute leaves that to the browser). --share-weeks emits weeks that
+are identical across groups once and references them by content hash.
+
+--assets also writes each group's weeks to public/data/assets/{mid}G{n}.<hash>.json
+(plus .gz, and .br when a Brotli encoder is available) and records them in
+public/data/manifest.json; the hashed names let netlify.toml serve them
+immutable, so a schedule change only invalidates the groups that changed.
+
+Data modules are streamed (write_js): rendered chunk by chunk into a temp
+file while being hashed, which only replaces the module on disk when the
+content hash differs, so unchanged modules keep their mtime (no Vite rebuild)
+and their bundle hash. --check writes nothing and exits 1 if any module is
+stale. bench_js_writer.py compares the peak memory with whole-string rendering.
+
+--format compact emits each module as one string table plus per-activity
+index tuples, decoded at import by src/data/compact.js (written alongside).
 """
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
 
+import argparse
+import functools
+import gzip
+import hashlib
 import json
 import os
+import re
+import shutil
+import subprocess
+import zlib
+from collections import Counter
+try:
+    import brotli  # optional; falls back to the brotli CLI, else no .br assets
+except ImportError:
+    brotli = None
+
+from pdf_cache import format_bytes
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "src", "data")
+FORMATS = ("literal", "compact")
+LAYOUTS = ("hub", "lazy", "single")
+MATERIA_NAMES = {
+    "cm": "Clínica Médica",
+    "go": "Ginecologia e Obstetrícia",
+    "ped": "Pediatria",
+    "cc": "Clínica Cirúrgica",
+}
+DECODER_PATH = os.path.join(DATA_DIR, "compact.js")
+ASSETS_DIR = os.path.join(BASE_DIR, "public", "data", "assets")
+MANIFEST_PATH = os.path.join(BASE_DIR, "public", "data", "manifest.json")
 
 
 def activity_to_js(a):
@@ -26,57 +71,741 @@ def activity_to_js(a):
     ]
     if a.get("loc"):
         parts.append(f'loc:{json.dumps(a["loc"], ensure_ascii=False)}')
+    if "effectiveType" in a:
+        parts.append(f'effectiveType:"{a["effectiveType"]}"')
     return "{" + ",".join(parts) + "}"
 
 
+def week_key(w):
+    """Content address of a week (its const name when shared between groups)."""
+    data = json.dumps(w, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return "W_" + hashlib.sha256(data).hexdigest()[:12]
+
+
+def shared_weeks(groups_data):
+    """{week_key: week} of the weeks whose content occurs in more than one group, first seen first."""
+    seen = {}
+    for g in sorted(groups_data.keys(), key=int):
+        for w in groups_data[g]:
+            seen.setdefault(week_key(w), (w, set()))[1].add(g)
+    return {key: w for key, (w, groups) in seen.items() if len(groups) > 1}
+
+
+def dedup_report(materia_id, groups_data):
+    """Unique vs total weeks of a matéria and how much of the literal week payload repeats."""
+    sizes = {}
+    total = payload = 0
+    for weeks in groups_data.values():
+        for w in weeks:
+            size = sizes.setdefault(week_key(w), len(week_to_js(w, indent=2).encode("utf-8")))
+            total += 1
+            payload += size
+    redundant = payload - sum(sizes.values())
+    pct = f" ({100 * (total - len(sizes)) / total:.1f}% repeated)" if total else ""
+    return (f"  {materia_id.upper()} weeks: {total} total, {len(sizes)} unique{pct}; "
+            f"{format_bytes(redundant)} of {format_bytes(payload)} week payload redundant")
+
+
+def iter_week_js(w, indent=4):
+    """week_to_js in chunks: the week header, one chunk per activity, the closing bracket."""
+    prefix = " " * indent
+    yield f'{prefix}{{num:{w["num"]},dates:"{w["dates"]}",activities:[\n'
+    sep = ""
+    for a in w["activities"]:
+        yield f"{sep}{prefix}    {activity_to_js(a)}"
+        sep = ",\n"
+    slots = f",slots:{json.dumps(w['slots'], separators=(',', ':'))}" if "slots" in w else ""
+    yield f"\n{prefix}]{slots}}}"
+
+
 def week_to_js(w, indent=4):
     """Convert a week dict to a JS object literal string."""
-    prefix = " " * indent
-    acts = ",\n".join(f"{prefix}    {activity_to_js(a)}" for a in w["activities"])
-    return f"""{prefix}{{num:{w["num"]},dates:"{w["dates"]}",activities:[
-{acts}
-{prefix}]}}"""
+    return "".join(iter_week_js(w, indent))
 
 
-def generate_materia_js(materia_id, groups_data):
-    """Generate a JS module for a matéria with weeksByGroup."""
-    lines = [f"// Auto-generated from PDF schedules — do not edit manually"]
-    lines.append(f"export const {materia_id.upper()}_BY_GROUP = {{")
+# ── Build-time precompute of scheduleData.js preProcess ───────────────────
+# inferType rules, in order: the first type whose needle occurs in the
+# lower-cased title wins (an exact "Horário Verde" title is checked first).
+EFFECTIVE_TYPE_RULES = (
+    ("ambulatorio", ("ambulatório", "ambulatorio", "ambulat")),
+    ("enfermaria", ("enfermaria",)),
+    ("alojamento", ("alojamento",)),
+    ("saude_mental", ("saúde mental", "saude mental")),
+    ("simulacao", ("simulações", "simulacoes", "simulação")),
+    ("destaque", ("simulado",)),
+    ("prova", ("prova",)),
+    ("plantao", ("plantão", "plantao")),
+    ("casa", ("consolidação", "consolidacao")),
+)
+# dayMap[day][turno] in this day-major order is the week's flat "slots" index
+SLOT_DAYS = ("2ª", "3ª", "4ª", "5ª", "6ª", "Sáb")
+SLOT_TURNOS = ("Manhã", "Tarde")
+
+
+def infer_type(a):
+    """Port of scheduleData.js inferType: the display type of an activity."""
+    if a["title"] == "Horário Verde":
+        return "horario_verde"
+    t = a["title"].lower()
+    for name, needles in EFFECTIVE_TYPE_RULES:
+        if any(n in t for n in needles):
+            return name
+    return a.get("type", "normal")
+
+
+def week_slots(w):
+    """Activity indices per (day, turno) slot, SLOT_DAYS x SLOT_TURNOS order."""
+    slots = {(d, t): [] for d in SLOT_DAYS for t in SLOT_TURNOS}
+    for i, a in enumerate(w["activities"]):
+        if (a["day"], a["turno"]) in slots:
+            slots[(a["day"], a["turno"])].append(i)
+    return [slots[(d, t)] for d in SLOT_DAYS for t in SLOT_TURNOS]
+
+
+def precompute_groups(groups_data):
+    """Copy of groups_data with effectiveType and a week slots index precomputed for preProcess."""
+    result = {}
+    for g, weeks in groups_data.items():
+        result[g] = []
+        for w in weeks:
+            acts = [{**a, "effectiveType": infer_type(a)} for a in w["activities"]]
+            week = {**w, "activities": acts}
+            week["slots"] = week_slots(week)
+            result[g].append(week)
+    return result
+
+
+def iter_weeks_js(weeks, indent, shared=()):
+    """One "<week literal>," (or "W_<key>," for shared weeks) line per week, in chunks."""
+    for w in weeks:
+        key = week_key(w) if shared else None
+        if key in shared:
+            yield f"{' ' * indent}{key},\n"
+        else:
+            yield from iter_week_js(w, indent)
+            yield ",\n"
+
+
+def iter_materia_js(materia_id, groups_data, shared=None):
+    """
+    Generate a JS module for a matéria with weeksByGroup, in chunks.
+    shared: {week_key: week} (shared_weeks) emitted once as consts and referenced.
+    """
+    shared = shared or {}
+    yield "// Auto-generated from PDF schedules — do not edit manually\n"
+    for key, w in shared.items():
+        yield f"const {key} = "
+        yield from iter_week_js(w, indent=0)
+        yield ";\n"
+    yield f"export const {materia_id.upper()}_BY_GROUP = {{\n"
 
     for g in sorted(groups_data.keys(), key=int):
-        weeks = groups_data[g]
-        lines.append(f"  {g}: [")
+        yield f"  {g}: [\n"
+        yield from iter_weeks_js(groups_data[g], 4, shared)
+        yield "  ],\n"
+
+    yield "};\n"
+
+
+# Decoder for the compact format. Week tuple: [num, dates, activities, slots?];
+# entries that are already week objects (shared weeks) pass through.
+# Activity tuple: string-table indices of
+# [day, turno, title, sub, time, type, loc?, id?, effectiveType?]; loc is null
+# when absent, id is only present when it is not the default
+# "<week num>-<position>" and effectiveType only when it differs from type.
+# Weeks carrying slots were precomputed: every activity gets an effectiveType.
+DECODER_JS = """// Auto-generated by scripts/generate_js.py — do not edit manually
+// Decodes --format compact data modules back into the week/activity objects.
+export function decodeWeeks(S, weeks) {
+  return weeks.map(t => Array.isArray(t) ? decodeWeek(S, t) : t);
+}
+
+function decodeWeek(S, [num, dates, acts, slots]) {
+  const w = {
+    num,
+    dates: S[dates],
+    activities: acts.map((a, i) => {
+      const o = {
+        id: a[7] != null ? S[a[7]] : `${num}-${i + 1}`,
+        day: S[a[0]], turno: S[a[1]], title: S[a[2]], sub: S[a[3]], time: S[a[4]], type: S[a[5]],
+      };
+      if (a[6] != null) o.loc = S[a[6]];
+      if (slots) o.effectiveType = a[8] != null ? S[a[8]] : o.type;
+      return o;
+    }),
+  };
+  if (slots) w.slots = slots;
+  return w;
+}
+"""
+
+
+def activity_fields(a, num, pos):
+    """Activity values in compact tuple order; trailing loc/id/effectiveType are None when defaulted."""
+    act_id = a["id"] if a["id"] != f"{num}-{pos}" else None
+    act_type = a.get("type", "normal")
+    effective = a.get("effectiveType", act_type)
+    return [a["day"], a["turno"], a["title"], a.get("sub", ""), a.get("time", ""),
+            act_type, a.get("loc") or None, act_id, effective if effective != act_type else None]
+
+
+def string_table(weeks_lists):
+    """
+    (table, index) for the compact format over several week lists: the most
+    frequent strings get the shortest indices, ties keep first-seen order.
+    """
+    counts = Counter()
+    for weeks in weeks_lists:
         for w in weeks:
-            lines.append(week_to_js(w, indent=4) + ",")
-        lines.append("  ],")
+            counts[w["dates"]] += 1
+            for pos, a in enumerate(w["activities"], 1):
+                counts.update(v for v in activity_fields(a, w["num"], pos) if v is not None)
+    table = sorted(counts, key=lambda v: -counts[v])
+    return table, {v: i for i, v in enumerate(table)}
+
+
+def compact_week_lines(weeks, index, indent, shared=()):
+    """Yield one "[num,dates,[activity tuples]]," line per week ("W_<key>," for shared weeks)."""
+    def act_tuple(a, num, pos):
+        fields = activity_fields(a, num, pos)
+        while len(fields) > 6 and fields[-1] is None:
+            fields.pop()
+        return "[" + ",".join("null" if v is None else str(index[v]) for v in fields) + "]"
+
+    def week_tuple(w):
+        acts = ",".join(act_tuple(a, w["num"], pos) for pos, a in enumerate(w["activities"], 1))
+        slots = f",{json.dumps(w['slots'], separators=(',', ':'))}" if "slots" in w else ""
+        return f"[{w['num']},{index[w['dates']]},[{acts}]{slots}]"
+
+    prefix = " " * indent
+    for w in weeks:
+        key = week_key(w) if shared else None
+        yield f"{prefix}{key}," if key in shared else f"{prefix}{week_tuple(w)},"
+
+
+def unshared(weeks, shared):
+    return [w for w in weeks if not shared or week_key(w) not in shared]
+
+
+def compact_table_lines(table):
+    return ['import { decodeWeeks } from "./compact.js";',
+            f"const S = {json.dumps(table, ensure_ascii=False, separators=(',', ':'))};"]
+
+
+def lines_js(lines):
+    """Newline-terminated chunks of an iterable of lines."""
+    for line in lines:
+        yield line + "\n"
 
+
+def iter_materia_compact_js(materia_id, groups_data, shared=None):
+    """iter_materia_js in the compact format: a string table and index tuples."""
+    shared = shared or {}
+    groups = sorted(groups_data.keys(), key=int)
+    table, index = string_table([list(shared.values())] +
+                                [unshared(groups_data[g], shared) for g in groups])
+    yield "// Auto-generated from PDF schedules — do not edit manually\n"
+    yield from lines_js(compact_table_lines(table))
+    if shared:
+        yield f"const [{', '.join(shared)}] = decodeWeeks(S, [\n"
+        yield from lines_js(compact_week_lines(shared.values(), index, 2))
+        yield "]);\n"
+    yield f"export const {materia_id.upper()}_BY_GROUP = {{\n"
+    for g in groups:
+        yield f"  {g}: decodeWeeks(S, [\n"
+        yield from lines_js(compact_week_lines(groups_data[g], index, 4, shared))
+        yield "  ]),\n"
+    yield "};\n"
+
+
+def iter_render_materia_js(materia_id, groups_data, fmt="literal", shared=None):
+    if fmt == "compact":
+        return iter_materia_compact_js(materia_id, groups_data, shared)
+    return iter_materia_js(materia_id, groups_data, shared)
+
+
+# ── Hub + per-group layout (src/data/{mid}.js importing {mid}G{n}.js) ──────
+def group_module_name(materia_id, g):
+    return f"{materia_id}G{g}.js"
+
+
+def group_export_name(materia_id, g):
+    return f"{materia_id.upper()}_G{g}"
+
+
+def shared_module_name(materia_id):
+    return f"{materia_id}Weeks.js"
+
+
+def iter_group_js(materia_id, g, weeks, fmt="literal", shared=None):
+    """
+    One group's module, in chunks: export const CM_G1 = [weeks].
+    shared: {week_key: week}; those weeks are imported from {mid}Weeks.js.
+    """
+    shared = shared or {}
+    yield f"// {MATERIA_NAMES[materia_id]} — Grupo {g} — Cronograma 2026.1\n"
+    used = [key for key in map(week_key, weeks) if key in shared] if shared else []
+    if used:
+        yield f'import {{ {", ".join(used)} }} from "./{shared_module_name(materia_id)}";\n'
+    name = group_export_name(materia_id, g)
+    if fmt == "compact":
+        table, index = string_table([unshared(weeks, shared)])
+        yield from lines_js(compact_table_lines(table))
+        yield f"export const {name} = decodeWeeks(S, [\n"
+        yield from lines_js(compact_week_lines(weeks, index, 2, shared))
+        yield "]);\n"
+    else:
+        yield f"export const {name} = [\n"
+        yield from iter_weeks_js(weeks, 2, shared)
+        yield "];\n"
+
+
+def iter_shared_weeks_js(materia_id, shared, fmt="literal"):
+    """{mid}Weeks.js in chunks: the weeks identical across groups, one named export each."""
+    yield f"// {MATERIA_NAMES[materia_id]} — Semanas idênticas entre grupos — Cronograma 2026.1\n"
+    if fmt == "compact":
+        table, index = string_table([list(shared.values())])
+        yield from lines_js(compact_table_lines(table))
+        yield f"export const [{', '.join(shared)}] = decodeWeeks(S, [\n"
+        yield from lines_js(compact_week_lines(shared.values(), index, 2))
+        yield "]);\n"
+    else:
+        for key, w in shared.items():
+            yield f"export const {key} = "
+            yield from iter_week_js(w, indent=0)
+            yield ";\n"
+
+
+def generate_hub_js(materia_id, groups):
+    """Hub statically importing every group module into {MID}_BY_GROUP."""
+    lines = [f"// {MATERIA_NAMES[materia_id]} — Cronograma 2026.1 (hub)",
+             "// Cada grupo em arquivo separado para facilitar manutenção"]
+    for g in groups:
+        lines.append(f'import {{ {group_export_name(materia_id, g)} }} from '
+                     f'"./{group_module_name(materia_id, g)}";')
+    lines.append("")
+    lines.append(f"export const {materia_id.upper()}_BY_GROUP = {{")
+    lines += [f"  {g}: {group_export_name(materia_id, g)}," for g in groups]
     lines.append("};")
     return "\n".join(lines) + "\n"
 
 
+def generate_lazy_hub_js(materia_id, groups):
+    """Hub whose loadGroup(g) dynamic-imports only that group's module; loadAllGroups() for all."""
+    lines = [f"// {MATERIA_NAMES[materia_id]} — Cronograma 2026.1 (hub)",
+             "// Cada grupo em arquivo separado, carregado sob demanda por loadGroup(g)",
+             f"export const GROUPS = [{', '.join(str(g) for g in groups)}];",
+             "",
+             "const LOADERS = {"]
+    lines += [f'  {g}: () => import("./{group_module_name(materia_id, g)}")'
+              f".then(m => m.{group_export_name(materia_id, g)}),"
+              for g in groups]
+    lines += ["};",
+              "",
+              "export function loadGroup(g) {",
+              "  const load = LOADERS[g];",
+              "  return load ? load() : Promise.resolve(null);",
+              "}",
+              "",
+              "export async function loadAllGroups() {",
+              "  const weeks = await Promise.all(GROUPS.map(loadGroup));",
+              "  return Object.fromEntries(GROUPS.map((g, i) => [g, weeks[i]]));",
+              "}"]
+    return "\n".join(lines) + "\n"
+
+
+def existing_groups(materia_id):
+    """Group numbers of the {mid}G{n}.js modules currently in DATA_DIR."""
+    pattern = re.compile(rf"^{re.escape(materia_id)}G(\d+)\.js$")
+    names = os.listdir(DATA_DIR) if os.path.isdir(DATA_DIR) else ()
+    return sorted(int(m.group(1)) for m in map(pattern.match, names) if m)
+
+
+def materia_modules(materia_id, groups_data, fmt="literal", layout="hub", partial=False,
+                    precompute=True, share_weeks=False):
+    """
+    ({path: module}, [paths to remove]) for one matéria in the given format and layout.
+    partial: groups_data holds only some groups (parse_cc --group); the hub keeps the rest.
+    """
+    if precompute:
+        groups_data = precompute_groups(groups_data)
+    shared = shared_weeks(groups_data) if share_weeks and not partial else {}
+    hub_path = os.path.join(DATA_DIR, f"{materia_id}.js")
+    shared_path = os.path.join(DATA_DIR, shared_module_name(materia_id))
+    on_disk = existing_groups(materia_id)
+    remove = [] if partial else [shared_path]
+    if layout == "single":
+        if not partial:
+            remove += [os.path.join(DATA_DIR, group_module_name(materia_id, g)) for g in on_disk]
+        renderer = functools.partial(iter_render_materia_js, materia_id, groups_data, fmt, shared)
+        return {hub_path: renderer}, remove
+
+    modules = {}
+    for g in sorted(groups_data.keys(), key=int):
+        path = os.path.join(DATA_DIR, group_module_name(materia_id, g))
+        modules[path] = functools.partial(iter_group_js, materia_id, g, groups_data[g], fmt, shared)
+    if shared:
+        modules[shared_path] = functools.partial(iter_shared_weeks_js, materia_id, shared, fmt)
+    groups = sorted({int(g) for g in groups_data} | (set(on_disk) if partial else set()))
+    hub = generate_lazy_hub_js if layout == "lazy" else generate_hub_js
+    modules[hub_path] = hub(materia_id, groups)
+    if not partial:
+        remove += [os.path.join(DATA_DIR, group_module_name(materia_id, g))
+                   for g in on_disk if g not in groups]
+    return modules, remove
+
+
+def add_format_modules(modules, fmt):
+    """Add the modules a format needs besides the data modules (the compact decoder)."""
+    if fmt == "compact":
+        modules[DECODER_PATH] = DECODER_JS
+    return modules
+
+
+WRITE_BUFFER = 1 << 12
+
+
+def write_js(module, out):
+    """Stream a module (string or renderer) to out, a file or write(str) callable, in batches."""
+    write = getattr(out, "write", out)
+    if isinstance(module, str):
+        write(module)
+        return
+    pending, size = [], 0
+    for chunk in module():
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= WRITE_BUFFER:
+            write("".join(pending))
+            pending, size = [], 0
+    if pending:
+        write("".join(pending))
+
+
+def module_text(module):
+    """A module's whole content as one string (for callers that need it)."""
+    chunks = []
+    write_js(module, chunks.append)
+    return "".join(chunks)
+
+
+class SizeMeter:
+    """Running (raw, gzip) byte size of the data fed to update()."""
+
+    def __init__(self):
+        self.z = zlib.compressobj(9, zlib.DEFLATED, 31)  # same stream as gzip.compress(level 9)
+        self.raw = self.gz = 0
+
+    def update(self, data):
+        self.raw += len(data)
+        self.gz += len(self.z.compress(data))
+
+    def sizes(self):
+        return self.raw, self.gz + len(self.z.flush())
+
+
+def module_digest(module, meter=None):
+    """SHA-256 of a module's UTF-8 bytes (bytes content as is), computed while streaming."""
+    if isinstance(module, bytes):
+        if meter is not None:
+            meter.update(module)
+        return content_digest(module)
+    h = hashlib.sha256()
+
+    def sink(chunk):
+        data = chunk.encode("utf-8")
+        h.update(data)
+        if meter is not None:
+            meter.update(data)
+    write_js(module, sink)
+    return h.hexdigest()
+
+
+def module_sizes(module):
+    """(raw, gzip) byte size of a module, measured while streaming it."""
+    meter = SizeMeter()
+    module_digest(module, meter)
+    return meter.sizes()
+
+
+def content_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def stream_module(module, path, old_digest, meter=None):
+    """Render a module once into path + ".tmp"; it replaces path only if its digest changed."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    h = hashlib.sha256()
+    with open(tmp, "wb") as f:
+        def sink(chunk):
+            data = chunk.encode("utf-8")
+            h.update(data)
+            f.write(data)
+            if meter is not None:
+                meter.update(data)
+        write_js(module, sink)
+    digest = h.hexdigest()
+    if digest == old_digest:
+        os.remove(tmp)
+    else:
+        os.replace(tmp, path)
+    return digest
+
+
+def file_digest(path):
+    """SHA-256 of a file's bytes, None if it does not exist."""
+    try:
+        with open(path, "rb") as f:
+            return content_digest(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def write_modules(modules, remove=(), check=False, sizes=None):
+    """
+    Write {path: module} files whose content hash differs from disk (check: only report).
+    Returns {"written", "unchanged", "removed"} path lists; sizes gets {path: (raw, gzip)}.
+    """
+    result = {"written": [], "unchanged": [], "removed": []}
+    for path, module in modules.items():
+        old = file_digest(path)
+        meter = SizeMeter() if sizes is not None else None
+        if check or isinstance(module, bytes):
+            digest = module_digest(module, meter)
+            if meter is not None:
+                sizes[path] = meter.sizes()
+            if old == digest:
+                result["unchanged"].append(path)
+                continue
+            if not check:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(module)
+        else:
+            digest = stream_module(module, path, old, meter)
+            if meter is not None:
+                sizes[path] = meter.sizes()
+            if digest == old:
+                result["unchanged"].append(path)
+                continue
+        result["written"].append(path)
+    for path in remove:
+        if path in modules or not os.path.exists(path):
+            continue
+        if not check:
+            os.remove(path)
+        result["removed"].append(path)
+    return result
+
+
+def write_summary(result, check=False, label="JS modules"):
+    """One stderr line for write_modules' result, plus the stale paths in check mode."""
+    written, unchanged, removed = (len(result[k]) for k in ("written", "unchanged", "removed"))
+    if not check:
+        return f"  {label}: {written} written, {unchanged} unchanged, {removed} removed"
+    lines = [f"  {label}: {written} stale, {unchanged} up to date, {removed} to remove"]
+    lines += [f"    stale: {os.path.relpath(p, BASE_DIR)}" for p in result["written"]]
+    lines += [f"    remove: {os.path.relpath(p, BASE_DIR)}" for p in result["removed"]]
+    return "\n".join(lines)
+
+
+def data_dir_sizes(written=None, remove=()):
+    """(raw, gzip) totals of the .js files in DATA_DIR, with write_modules sizes (written) applied."""
+    written = written or {}
+    sizes = {}
+    for name in sorted(os.listdir(DATA_DIR)) if os.path.isdir(DATA_DIR) else ():
+        path = os.path.join(DATA_DIR, name)
+        if name.endswith(".js") and path not in written:
+            with open(path, "rb") as f:
+                sizes[path] = module_sizes(f.read())
+    for path in remove:
+        sizes.pop(path, None)
+    sizes.update(written)
+    return tuple(map(sum, zip((0, 0), *sizes.values())))
+
+
+def size_report(before, after):
+    (raw0, gz0), (raw1, gz1) = before, after
+    return (f"  src/data: {format_bytes(raw0)} → {format_bytes(raw1)} raw, "
+            f"{format_bytes(gz0)} → {format_bytes(gz1)} gzip")
+
+
+def precompute_report(sizes, plain_modules, activities, weeks):
+    """Bytes precompute_groups adds (sizes vs plain_modules) against the import-time work it removes."""
+    raw1, gz1 = map(sum, zip((0, 0), *(sizes[path] for path in plain_modules)))
+    raw0, gz0 = map(sum, zip((0, 0), *map(module_sizes, plain_modules.values())))
+    return (f"  Precompute: +{format_bytes(raw1 - raw0)} raw, +{format_bytes(gz1 - gz0)} gzip; "
+            f"saves {activities} inferType calls + activity copies and {weeks} dayMap "
+            f"scans at import")
+
+
+def count_groups(groups_data):
+    """(activities, weeks) in a {group: weeks} dict."""
+    weeks = [w for ws in groups_data.values() for w in ws]
+    return sum(len(w["activities"]) for w in weeks), len(weeks)
+
+
+def is_stale(result):
+    return bool(result["written"] or result["removed"])
+
+
+def brotli_encoder():
+    """bytes → Brotli bytes via the brotli module or the brotli CLI; None if neither is present."""
+    if brotli is not None:
+        return lambda data: brotli.compress(data, quality=11)
+    exe = shutil.which("brotli")
+    if exe is None:
+        return None
+    return lambda data: subprocess.run([exe, "-c", "-q", "11"], input=data,
+                                       stdout=subprocess.PIPE, check=True).stdout
+
+
+def existing_assets(materia_id):
+    """{group: [file names]} of the hashed {mid}G{n}.*.json[.gz|.br] assets in ASSETS_DIR."""
+    pattern = re.compile(rf"^{re.escape(materia_id)}G(\d+)\.[0-9a-f]+\.json(?:\.gz|\.br)?$")
+    found = {}
+    for name in sorted(os.listdir(ASSETS_DIR)) if os.path.isdir(ASSETS_DIR) else ():
+        m = pattern.match(name)
+        if m:
+            found.setdefault(int(m.group(1)), []).append(name)
+    return found
+
+
+def materia_assets(materia_id, groups_data, partial=False, precompute=True, encode_br=None):
+    """({path: bytes}, [paths to remove], {group: entry}) of a matéria's hashed JSON assets."""
+    if precompute:
+        groups_data = precompute_groups(groups_data)
+    files, entries = {}, {}
+    for g in sorted(groups_data.keys(), key=int):
+        data = json.dumps(groups_data[g], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        digest = content_digest(data)
+        name = f"{materia_id}G{g}.{digest[:12]}.json"
+        path = os.path.join(ASSETS_DIR, name)
+        files[path] = data
+        entry = {"file": f"assets/{name}", "hash": digest, "bytes": len(data)}
+        gz = gzip.compress(data, compresslevel=9, mtime=0)
+        files[path + ".gz"] = gz
+        entry["gzip"] = len(gz)
+        if encode_br:
+            br = encode_br(data)
+            files[path + ".br"] = br
+            entry["br"] = len(br)
+        entries[str(g)] = entry
+    remove = [os.path.join(ASSETS_DIR, name)
+              for g, names in existing_assets(materia_id).items()
+              if not partial or str(g) in entries
+              for name in names]
+    return files, remove, entries
+
+
+def manifest_json(entries_by_materia, partial=False):
+    """manifest.json with the given matérias' entries replaced (group by group with partial)."""
+    try:
+        with open(MANIFEST_PATH, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = {}
+    for mid, entries in entries_by_materia.items():
+        manifest[mid] = {**manifest.get(mid, {}), **entries} if partial else entries
+        manifest[mid] = dict(sorted(manifest[mid].items(), key=lambda kv: int(kv[0])))
+    return json.dumps(dict(sorted(manifest.items())), ensure_ascii=False, indent=2) + "\n"
+
+
+def assets_report(entries_by_materia, encode_br):
+    """Group count and raw/gzip/br totals of the assets materia_assets() produced."""
+    entries = [e for es in entries_by_materia.values() for e in es.values()]
+    raw, gz = sum(e["bytes"] for e in entries), sum(e["gzip"] for e in entries)
+    br = (f"{format_bytes(sum(e['br'] for e in entries))} br" if encode_br
+          else "no .br (brotli module/CLI not found)")
+    return (f"  Assets: {len(entries)} groups, {format_bytes(raw)} raw, {format_bytes(gz)} gzip, "
+            f"{br} → {os.path.relpath(ASSETS_DIR, BASE_DIR)}")
+
+
+def add_output_args(parser):
+    """Add the module output options (--check, --format, --layout, ...) to an argparse parser."""
+    parser.add_argument('--check', action='store_true',
+                        help='Write nothing; exit 1 if any src/data module is out of date')
+    parser.add_argument('--format', choices=FORMATS, default='literal',
+                        help='Object literals (default) or a string table + index tuples')
+    parser.add_argument('--no-precompute', action='store_true',
+                        help='Leave effectiveType/dayMap to scheduleData.js preProcess at import')
+    parser.add_argument('--precompute-report', action='store_true',
+                        help='Also render the modules without precompute to report what it costs')
+    parser.add_argument('--share-weeks', action='store_true',
+                        help='Emit weeks identical across groups once ({mid}Weeks.js) and '
+                             'reference them by content hash')
+    parser.add_argument('--layout', choices=LAYOUTS, default='hub',
+                        help='Hub importing {mid}G{n}.js modules (default), the same with '
+                             'loadGroup(g) dynamic imports, or one module per matéria')
+    parser.add_argument('--assets', action='store_true',
+                        help='Also emit content-hashed per-group JSON assets (+ .gz/.br) and '
+                             'manifest.json in public/data')
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Generate src/data JS modules from all_data.json")
+    add_output_args(parser)
+    args = parser.parse_args()
+
     json_path = os.path.join(BASE_DIR, "scripts", "all_data.json")
     with open(json_path, "r", encoding="utf-8") as f:
         data = json.load(f)
 
-    os.makedirs(DATA_DIR, exist_ok=True)
-
+    modules = {}
+    plain_modules = {}
+    remove = []
+    counts = [0, 0]
+    encode_br = brotli_encoder() if args.assets else None
+    assets, stale_assets, entries = {}, [], {}
     for mid in ["cm", "go", "ped"]:
         if mid not in data:
             print(f"  [SKIP] {mid} — not in JSON", file=sys.stderr)
             continue
 
         groups = data[mid]
-        js_content = generate_materia_js(mid, groups)
         out_path = os.path.join(DATA_DIR, f"{mid}.js")
-        with open(out_path, "w", encoding="utf-8") as f:
-            f.write(js_content)
+        materia, stale = materia_modules(mid, groups, args.format, args.layout,
+                                         precompute=not args.no_precompute,
+                                         share_weeks=args.share_weeks)
+        modules.update(materia)
+        remove += stale
+        if args.precompute_report and not args.no_precompute:
+            plain_modules.update(materia_modules(mid, groups, args.format, args.layout,
+                                                 precompute=False,
+                                                 share_weeks=args.share_weeks)[0])
+            counts = [c + n for c, n in zip(counts, count_groups(groups))]
 
         total_acts = sum(
             sum(len(w["activities"]) for w in weeks)
             for weeks in groups.values()
         )
         print(f"  {mid.upper()}: {len(groups)} groups, {total_acts} total activities → {out_path}", file=sys.stderr)
+        print(dedup_report(mid, groups), file=sys.stderr)
+        if args.assets:
+            files, stale, entries[mid] = materia_assets(mid, groups,
+                                                        precompute=not args.no_precompute,
+                                                        encode_br=encode_br)
+            assets.update(files)
+            stale_assets += stale
+
+    add_format_modules(modules, args.format)
+    before = data_dir_sizes()
+    sizes = {}
+    result = write_modules(modules, remove, check=args.check, sizes=sizes)
+    print(write_summary(result, check=args.check), file=sys.stderr)
+    print(size_report(before, data_dir_sizes(sizes, remove)), file=sys.stderr)
+    if plain_modules:
+        print(precompute_report(sizes, plain_modules, *counts), file=sys.stderr)
+    if args.assets:
+        assets[MANIFEST_PATH] = manifest_json(entries)
+        asset_result = write_modules(assets, stale_assets, check=args.check)
+        print(assets_report(entries, encode_br), file=sys.stderr)
+        print(write_summary(asset_result, check=args.check, label="Asset files"), file=sys.stderr)
+        if args.check and is_stale(asset_result):
+            sys.exit(1)
+    if args.check and is_stale(result):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -13,12 +13,21 @@ import re
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
-from parse_pdfs import extract_schedule
-from generate_js import generate_materia_js
+from collections import Counter
+from parse_pdfs import (extract_schedules, page_stats_summary, peak_rss_summary,
+                        ClassifiedCells, layer_stats_summary, EXTRACT_ENGINES,
+                        EXTRACTOR_VERSION, GEOMETRY_VERSION)
+from pdf_cache import PdfCache, add_cache_args
+from generate_js import (materia_modules, add_format_modules, write_modules, write_summary,
+                         is_stale, data_dir_sizes, size_report, precompute_report,
+                         count_groups, dedup_report, add_output_args, brotli_encoder,
+                         materia_assets, manifest_json, assets_report, MANIFEST_PATH)
+from postprocess_rules import RuleSet
 
 CC_DIR = os.path.join(
     BASE_DIR, "CRONOGRAMAS 2026.1 - MOD1", "OneDrive_2026-02-24",
 )
+CC_RULES = RuleSet.load(os.path.join(BASE_DIR, "scripts", "cc_rules.json"))
 
 
 def find_cc_pdfs():
@@ -60,204 +69,12 @@ def find_cc_pdfs():
     return group_files
 
 
-def postprocess_cc(weeks):
-    """Fix known CC-specific OCR garbling issues."""
-    for w in weeks:
-        acts_to_remove = []
-        for i, a in enumerate(w['activities']):
-            title = a['title']
-            upper = title.upper()
-
-            # ── Garbled "Centro de Simulação" variants ──
-            # "CPreonfatr.o A dnea SCimláuuldaiçaã Zoo n", "SCaelnat ro de S Cimaumlapçuãso"
-            # "Centro de Sim ulação"
-            if (('CPRE' in upper and ('IMUL' in upper or 'SCIM' in upper)) or
-                ('SCAELN' in upper and 'CIR' not in upper) or
-                re.search(r'Centro\s+de\s+Sim\s+ula', title)):
-                a['title'] = "Centro de Simulação"
-                a['type'] = 'simulacao'
-                if not a.get('sub') or len(a['sub']) < 3:
-                    a['sub'] = ""
-                continue
-
-            # ── Garbled "ECG" + "Prof. Emílo" ──
-            # "EPCroGf. Emílo"
-            if 'EPCR' in upper or (re.search(r'E.?P.?C.?r.?o.?G', title)):
-                a['title'] = "ECG"
-                a['sub'] = "Prof. Emílo"
-                a['loc'] = a.get('loc') or "Sala 7211 – Campus"
-                continue
-
-            # ── Garbled "Ambulatório" + doctor name ──
-            # "ADmrab. Cullaetróisr io" (Ambulatório + Dra. Cleris)
-            # "ADmr. Fbáublaiotó r io" (Ambulatório + Dr. Fábio)
-            # "APrmofbau. lAaltiónreio" (Ambulatório + Profa. Aline)
-            # "ADmr. Hbuulmatbóeriroto" (Ambulatório + Dr. Humberto)
-            is_garbled_amb = (
-                ('ADMR' in upper and ('CULL' in upper or 'FBÁU' in upper or 'HBUUL' in upper or 'BLAIO' in upper)) or
-                ('APRMOFB' in upper)
-            )
-            if is_garbled_amb:
-                a['type'] = 'ambulatorio'
-                if 'CULL' in upper:
-                    a['title'] = "Ambulatório"
-                    a['sub'] = "Dra. Cleris"
-                elif 'FBÁU' in upper or 'FÁUBI' in upper:
-                    a['title'] = "Ambulatório"
-                    a['sub'] = "Dr. Fábio"
-                elif 'APRMOFB' in upper or 'ALIN' in upper:
-                    a['title'] = "Ambulatório"
-                    a['sub'] = "Profa. Aline"
-                elif 'HBUUL' in upper:
-                    a['title'] = "Ambulatório"
-                    a['sub'] = "Dr. Humberto"
-                else:
-                    a['title'] = "Ambulatório"
-                continue
-
-            # ── Garbled "Atividade de consolidação e Performance" ──
-            # "Ae tPiveirdfaodrme adnec ceo -n EsMol iCdaAçSãAo"
-            # "Atividade de" (truncated)
-            # "e Perf or manc e EM CASA Ambulatório"
-            # "Perfor m ance EM CASA Ambulatório"
-            if ('ESMOL' in upper or
-                re.search(r'AE\s*T.*PEIR', upper) or
-                (upper.strip() == 'ATIVIDADE DE') or
-                (re.search(r'PERF.{0,5}M.{0,3}NC', upper) and 'EM CASA' in upper)):
-                a['title'] = "Consolidação e Performance"
-                a['sub'] = "Em Casa"
-                a['type'] = 'casa'
-                continue
-
-            # ── Garbled "Simulado Nacional MEDCOF" ──
-            # "SIMULMADEDOC NOAFCFI ONAL"
-            if ('SIMUL' in upper and 'NOAF' in upper) or \
-               ('SIMUL' in upper and 'MEDOC' in upper) or \
-               ('SIMUL' in upper and 'ADEDOC' in upper):
-                a['title'] = "Simulado Nacional MEDCOF"
-                a['type'] = 'destaque'
-                a['sub'] = "Campus Universitário"
-                a['time'] = a.get('time') or "13:00–18:00"
-                continue
-
-            # ── Garbled "Sessão Clínica" + "Prof. Nilson" ──
-            # "SPerosfs. ãNoi lCsolínn ica"
-            if ('SPEROSF' in upper or
-                (re.search(r'S.{0,3}PER.{0,3}[OA]', upper) and 'ILSO' in upper)):
-                a['title'] = "Sessão Clínica"
-                a['sub'] = "Prof. Nilson"
-                a['type'] = 'normal'
-                continue
-
-            # ── Garbled "Trauma" + "Prof. Rossano Fiorelli" ──
-            # "TPrraouf.m Rao ssano Fiorelli"
-            if ('TPRRAO' in upper or
-                (re.search(r'T.{0,2}R.{0,2}A.{0,2}U', upper) and 'ROSSANO' in upper)):
-                a['title'] = "Trauma"
-                a['sub'] = "Prof. Rossano Fiorelli"
-                a['type'] = 'normal'
-                continue
-
-            # ── Garbled "Saúde Digital" / "Profa. Manuela Marcati" ──
-            # "PCraomfap. uMsa nuela Marcati"
-            if re.search(r'manuela\s+marcati', title, re.IGNORECASE) or \
-               ('PCRA' in upper and 'MARCATI' in upper) or \
-               ('MANUELA' in upper):
-                a['title'] = "Saúde Digital"
-                a['sub'] = "Profa. Manuela Marcati"
-                a['loc'] = a.get('loc') or "Campus"
-                continue
-
-            # ── Garbled "Centro cirúrgico" + "CAMPUS" ──
-            # "SCaelnat ro cir úCrAgiMcoP U S"
-            if re.search(r'centro\s+cir', title, re.IGNORECASE) or \
-               ('SCAELN' in upper and 'CIR' in upper):
-                a['title'] = "Centro Cirúrgico"
-                a['type'] = 'normal'
-                continue
-
-            # ── Fix "Prof. Emílo" as title → should be "ECG" ──
-            if upper.strip() == 'PROF. EMÍLO' or upper.strip() == 'PROF. EMILO':
-                a['title'] = "ECG"
-                a['sub'] = "Prof. Emílo"
-                a['loc'] = a.get('loc') or "Sala 7211 – Campus"
-                continue
-
-            # ── Fix "Prof. Rossano Fiorelli" as standalone title ──
-            if re.search(r'ROSSANO\s+FIORELLI', upper):
-                a['title'] = "Trauma"
-                a['sub'] = "Prof. Rossano Fiorelli"
-                continue
+def postprocess_cc(weeks, rules=None):
+    """Fix known CC-specific OCR garbling issues (rules from cc_rules.json)."""
+    (rules or CC_RULES).apply(weeks)
 
-            # ── Fix "Cirurgião Vascular" as title → should be Ambulatório sub ──
-            if 'VASCULAR' in upper:
-                a['title'] = "Ambulatório"
-                a['sub'] = a.get('sub') or "Dr. Sandro – Cirurgião Vascular"
-                a['type'] = 'ambulatorio'
-                continue
-
-            # ── Fix garbled "Vigilância Epidemiológica" ──
-            if (re.search(r'vigil', title, re.IGNORECASE) or
-                re.search(r'epidemiol', title, re.IGNORECASE) or
-                'VAIGV' in upper or 'PVAI' in upper or
-                (re.search(r'V.{0,3}I.{0,3}G.{0,3}I', upper) and 'HOTEL' in upper)):
-                a['title'] = "Vigilância Epidemiológica"
-                a['sub'] = a.get('sub') or "Prof. Sebastião"
-                continue
-
-            # ── Fix garbled "Horário Verde" → "HORÁ R IO VER DE" ──
-            if re.search(r'HOR.{0,4}\s*R\s*IO\s+VER', upper):
-                a['title'] = "Horário Verde"
-                a['type'] = 'verde'
-                a['time'] = ""
-                continue
-
-            # ── Fix "SIMUL A DO G ERAL" → Simulado Geral do Módulo ──
-            if re.search(r'SIMUL\s*A\s*DO\s+G\s*ERAL', upper):
-                a['title'] = "Simulado Geral do Módulo"
-                a['type'] = 'destaque'
-                a['sub'] = "Campus Universitário"
-                a['time'] = a.get('time') or "13:00–18:00"
-                continue
-
-            # ── Fix standalone "CAMPUS" / "CAMP U S" ──
-            if re.match(r'^CAMP\s*U?\s*S$', upper.strip()):
-                acts_to_remove.append(i)
-                continue
-
-            # ── Fix "Hands on" title that includes professor ──
-            if upper.startswith('HANDS ON'):
-                parts = re.split(r'\s+(?=Profa?\.|Dr[aª]?\.)', title, maxsplit=1)
-                if len(parts) == 2:
-                    a['title'] = "Hands on"
-                    a['sub'] = parts[1].strip()
-                else:
-                    a['title'] = "Hands on"
-                continue
-
-            # ── Normalize common titles ──
-            title_map = {
-                'ENFERMARIA': 'Enfermaria',
-                'AMBULATÓRIO': 'Ambulatório',
-                'AMBULATORIO': 'Ambulatório',
-                'TRAUMA': 'Trauma',
-            }
-            if a['title'].upper().strip() in title_map:
-                a['title'] = title_map[a['title'].upper().strip()]
-
-            # ── Fix ambulatório type ──
-            if 'ambulat' in a['title'].lower():
-                a['type'] = 'ambulatorio'
-
-            # ── Fix ECG location ──
-            if a['title'].strip().upper() == 'ECG':
-                a['loc'] = a.get('loc') or "Sala 7211 – Campus"
-
-        # Remove marked activities (in reverse to keep indices valid)
-        for idx in reversed(acts_to_remove):
-            w['activities'].pop(idx)
-
-        # Re-number activity IDs
+    # Re-number activity IDs
+    for w in weeks:
         for i, a in enumerate(w['activities'], 1):
             a['id'] = f"{w['num']}-{i}"
 
@@ -269,8 +86,21 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--group', type=int, help='Process single group')
     parser.add_argument('--debug', action='store_true')
+    parser.add_argument('--engine', choices=EXTRACT_ENGINES, default='chars',
+                        help='Cell text engine: bucketed page.chars (default) or per-cell page.crop')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Parse group PDFs in N worker processes (output is identical)')
+    parser.add_argument('--no-stream', action='store_true',
+                        help='Keep every page\'s parsed objects until the PDF is closed')
     parser.add_argument('--json-only', action='store_true', help='Only output JSON, do not generate JS')
+    parser.add_argument('--rule-stats', action='store_true',
+                        help='Print per-rule hit counts and timings of cc_rules.json')
+    add_output_args(parser)
+    add_cache_args(parser)
     args = parser.parse_args()
+    cache = PdfCache.from_args(args, EXTRACTOR_VERSION)
+    geometry_cache = PdfCache.from_args(args, GEOMETRY_VERSION)
+    page_stats = Counter()
 
     group_files = find_cc_pdfs()
     if not group_files:
@@ -283,6 +113,13 @@ def main():
 
     groups_to_process = [args.group] if args.group else sorted(group_files.keys())
     results = {}
+    classified = ClassifiedCells()
+    extracted = extract_schedules(
+        [group_files[g] for g in groups_to_process if g in group_files],
+        jobs=args.jobs, cache=cache, page_stats=page_stats, classified=classified,
+        geometry_cache=geometry_cache,
+        debug=args.debug, engine=args.engine, stream=not args.no_stream,
+    )
 
     for g in groups_to_process:
         filepath = group_files.get(g)
@@ -291,7 +128,8 @@ def main():
             continue
 
         print(f"\n  Parsing G{g}: {os.path.basename(filepath)}", file=sys.stderr)
-        weeks = extract_schedule(filepath, debug=args.debug)
+        weeks, log = next(extracted)
+        sys.stderr.write(log)
         weeks = postprocess_cc(weeks)
         total = sum(len(w['activities']) for w in weeks)
         print(f"    → {len(weeks)} weeks, {total} activities", file=sys.stderr)
@@ -307,6 +145,18 @@ def main():
 
         results[g] = weeks
 
+    extracted.close()  # joins pool workers
+    print(cache.summary(), file=sys.stderr)
+    print(geometry_cache.summary("Geometry cache"), file=sys.stderr)
+    print(page_stats_summary(page_stats), file=sys.stderr)
+    print(classified.summary(), file=sys.stderr)
+    print(layer_stats_summary(), file=sys.stderr)
+    print(CC_RULES.summary("CC rules"), file=sys.stderr)
+    if args.rule_stats:
+        print(CC_RULES.table(), file=sys.stderr)
+    if peak_rss_summary():
+        print(peak_rss_summary(workers=args.jobs > 1), file=sys.stderr)
+
     # Output JSON
     json_str = json.dumps({"cc": results}, ensure_ascii=False, indent=2)
 
@@ -316,18 +166,45 @@ def main():
 
     # Save JSON
     json_path = os.path.join(BASE_DIR, "scripts", "cc_data.json")
-    with open(json_path, "w", encoding="utf-8") as f:
-        f.write(json_str)
-    print(f"\n  JSON saved to {json_path}", file=sys.stderr)
+    if not args.check:
+        with open(json_path, "w", encoding="utf-8") as f:
+            f.write(json_str)
+        print(f"\n  JSON saved to {json_path}", file=sys.stderr)
 
     # Generate JS
-    js_content = generate_materia_js("cc", results)
     js_path = os.path.join(BASE_DIR, "src", "data", "cc.js")
-    with open(js_path, "w", encoding="utf-8") as f:
-        f.write(js_content)
+    modules, remove = materia_modules("cc", results, args.format, args.layout,
+                                      partial=bool(args.group),
+                                      precompute=not args.no_precompute,
+                                      share_weeks=args.share_weeks)
+    add_format_modules(modules, args.format)
+    before = data_dir_sizes()
+    sizes = {}
+    result = write_modules(modules, remove, check=args.check, sizes=sizes)
 
     total_acts = sum(sum(len(w['activities']) for w in weeks) for weeks in results.values())
     print(f"\n  CC: {len(results)} groups, {total_acts} total activities → {js_path}", file=sys.stderr)
+    print(dedup_report("cc", results), file=sys.stderr)
+    print(write_summary(result, check=args.check), file=sys.stderr)
+    print(size_report(before, data_dir_sizes(sizes, remove)), file=sys.stderr)
+    if args.precompute_report and not args.no_precompute:
+        plain_modules, _ = materia_modules("cc", results, args.format, args.layout,
+                                           partial=bool(args.group), precompute=False,
+                                           share_weeks=args.share_weeks)
+        print(precompute_report(sizes, plain_modules, *count_groups(results)), file=sys.stderr)
+    if args.assets:
+        encode_br = brotli_encoder()
+        assets, stale_assets, entries = materia_assets("cc", results, partial=bool(args.group),
+                                                       precompute=not args.no_precompute,
+                                                       encode_br=encode_br)
+        assets[MANIFEST_PATH] = manifest_json({"cc": entries}, partial=bool(args.group))
+        asset_result = write_modules(assets, stale_assets, check=args.check)
+        print(assets_report({"cc": entries}, encode_br), file=sys.stderr)
+        print(write_summary(asset_result, check=args.check, label="Asset files"), file=sys.stderr)
+        if args.check and is_stale(asset_result):
+            sys.exit(1)
+    if args.check and is_stale(result):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
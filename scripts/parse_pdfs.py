@@ -6,10 +6,36 @@ Uses pdfplumber table extraction with x-position-based column-to-day mapping.
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
 
+import contextlib
+import functools
+import hashlib
+import io
 import json
 import re
 import os
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter
+try:
+    import resource  # POSIX only
+except ImportError:
+    resource = None
 import pdfplumber
+from pdfplumber.page import test_proposed_bbox
+from pdfminer.pdftypes import resolve1
+from pdfminer.psparser import LIT
+from pdfplumber.utils import chars_to_textmap, clip_obj
+from concurrent.futures import ProcessPoolExecutor
+from pdf_cache import PdfCache, add_cache_args
+from garble_keywords import KEYWORDS
+
+# Bump whenever the raw cell_data produced by extract_cells changes: invalidates
+# scripts/.pdf_cache. Classification (clean/parse_cell_text) is re-run on every
+# run from the cached cells, so rule changes need no bump.
+EXTRACTOR_VERSION = "2026.1-2"
+# Bump when find_page_tables' derived geometry (table filter, x/y merging) or
+# the page_content_digest key changes
+GEOMETRY_VERSION = f"2-pdfplumber-{pdfplumber.__version__}"
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 PDF_BASE = os.path.join(BASE_DIR, "CRONOGRAMAS 2026.1 - MOD1")
@@ -41,27 +67,37 @@ WEEK_DATES = {
 
 # Matches HH:MM – HH:MM (including "às" Portuguese form)
 TIME_RE = re.compile(r'(\d{1,2}):(\d{2})\s*(?:[–\-]|às|a)\s*(\d{1,2}):(\d{2})')
-# Matches lone timestamp like "08:00" (no end time)
-SINGLE_TIME_RE = re.compile(r'^\d{1,2}:\d{2}$')
-# Matches "Manhã – 08:00" or "Tarde - 14:00" (turno markers in cells)
-TURNO_LINE_RE = re.compile(r'^(Manh[aã]|Tarde)\s*[-–]\s*\d{1,2}:\d{2}', re.IGNORECASE)
 # Matches professor/preceptor names
 PROF_RE = re.compile(r'^(Prof[aª]?\.?\s|Dr[aª]?\.?\s|Precep\.?\s)', re.IGNORECASE)
 
+# Time overlay chars stripped from digit-garbled lines
+GARBLE_TIME_CHARS_RE = re.compile(r'[\d:–\-]')
+MULTI_SPACE_RE = re.compile(r'  +')
+
 # Location line detection (startswith-based to avoid false positives)
 LOC_START_KWDS = ("Pavilhão", "pavilhão", "Campus", "campus",
                   "Sala ", "sala ", "SALA ", "Local ", "local ",
                   "Sala de ")
 
-def is_loc_line(lc):
-    """True if this line is primarily a location reference."""
-    if any(lc.startswith(kw) for kw in LOC_START_KWDS):
-        return True
-    if lc == "HUV":
-        return True
-    if re.match(r'^\d{4}', lc):   # room numbers like "8301", "7203"
-        return True
-    return False
+# Cell line lexer: one match per stripped line; the first alternative that
+# matches names the token (its outermost group is m.lastgroup).
+_PROF_LOC_PATTERN = (
+    # PROF_RE
+    r'(?P<prof>(?i:prof[aª]?\.?\s|dr[aª]?\.?\s|precep\.?\s))'
+    # Location: LOC_START_KWDS, the bare "HUV", room numbers like "8301"
+    r'|(?P<loc>' + '|'.join(map(re.escape, LOC_START_KWDS)) + r'|HUV$|\d{4})'
+)
+CELL_LINE_RE = re.compile(
+    # Lone timestamp like "08:00" (no end time)
+    r'(?P<single>\d{1,2}:\d{2}$)'
+    # "Manhã – 08:00" or "Tarde - 14:00" (turno markers in cells)
+    r'|(?P<turno>(?i:manh[aã]|tarde)\s*[-–]\s*\d{1,2}:\d{2})'
+    # HH:MM – HH:MM anywhere in the line (TIME_RE)
+    r'|.*?(?P<time>(?P<h1>\d{1,2}):(?P<m1>\d{2})\s*(?:[–\-]|às|a)\s*(?P<h2>\d{1,2}):(?P<m2>\d{2}))'
+    r'|' + _PROF_LOC_PATTERN
+)
+# Lines without a ':' hold no time, so they only need the PROF/LOC alternatives
+CELL_TEXT_LINE_RE = re.compile(_PROF_LOC_PATTERN)
 
 
 # Day name patterns → normalized abbreviation
@@ -82,48 +118,104 @@ FULL_DAY_NAMES = {
 DAY_MAP.update(FULL_DAY_NAMES)
 
 
-def is_garbled_digit(text):
-    """Detect digit-alpha interleaving: time chars mixed with title chars by x-position."""
-    if len(text) < 6:
-        return False
-
-    def _count_transitions(s):
-        transitions = 0
-        prev_type = None
-        relevant = 0
-        for c in s:
-            if c.isdigit():
-                cur = 'd'
-            elif c.isalpha():
-                cur = 'a'
-            else:
-                continue
-            relevant += 1
-            if prev_type and cur != prev_type:
-                transitions += 1
-            prev_type = cur
-        return transitions, relevant
+class _CharClassMap(dict):
+    """
+    str.translate table built on demand: maps each code point through classify(ch)
+    (a 1-char class string, or None to delete the char) and remembers the result.
+    """
+
+    def __init__(self, classify, keep='\n'):
+        super().__init__({ord(c): c for c in keep})
+        self.classify = classify
+
+    def __missing__(self, cp):
+        cls = self[cp] = self.classify(chr(cp))
+        return cls
+
 
-    # Fast path: check first 14 chars
-    trans_first, rel_first = _count_transitions(text[:14])
-    if rel_first >= 5 and trans_first >= 3:
-        return True
+# 'd' digit / 'a' letter, everything else dropped (is_garbled_digit)
+DIGIT_ALPHA_CLASSES = _CharClassMap(
+    lambda c: 'd' if c.isdigit() else 'a' if c.isalpha() else None)
+# 'U' upper-case letter / 'l' other letter, everything else dropped (is_garbled_case)
+LETTER_CASE_CLASSES = _CharClassMap(
+    lambda c: ('U' if c.isupper() else 'l') if c.isalpha() else None)
 
-    # Slow path: check whole string (catches digits buried mid-string)
-    digit_count = sum(1 for c in text if c.isdigit())
-    if digit_count < 4:
-        return False
-    trans_all, rel_all = _count_transitions(text)
-    return rel_all >= 8 and trans_all / rel_all >= 0.25
+
+def _class_strings(lines, table):
+    """Translate all lines in one call; lines must not contain '\\n'."""
+    if not lines:
+        return []
+    return '\n'.join(lines).translate(table).split('\n')
+
+
+def _distinct_batch(flags_of):
+    """Run a batch detector on the distinct lines only (cells repeat a lot) and fan out."""
+    @functools.wraps(flags_of)
+    def flags(lines):
+        lines = list(lines)
+        distinct = list(dict.fromkeys(lines))
+        if len(distinct) == len(lines):
+            return flags_of(lines)
+        by_line = dict(zip(distinct, flags_of(distinct)))
+        return [by_line[l] for l in lines]
+    return flags
+
+
+@_distinct_batch
+def garbled_digit_flags(lines):
+    """
+    is_garbled_digit for a batch of lines: digit-alpha interleaving, where time
+    chars got mixed into title chars by x-position.
+    """
+    flags = []
+    heads = _class_strings([l[:14] for l in lines], DIGIT_ALPHA_CLASSES)
+    fulls = _class_strings(lines, DIGIT_ALPHA_CLASSES)
+    for line, head, full in zip(lines, heads, fulls):
+        if len(line) < 6:
+            flags.append(False)
+            continue
+        # Fast path: first 14 chars
+        if len(head) >= 5 and head.count('ad') + head.count('da') >= 3:
+            flags.append(True)
+            continue
+        # Slow path: whole string (catches digits buried mid-string)
+        if full.count('d') < 4:
+            flags.append(False)
+            continue
+        transitions = full.count('ad') + full.count('da')
+        flags.append(len(full) >= 8 and transitions / len(full) >= 0.25)
+    return flags
+
+
+@_distinct_batch
+def garbled_case_flags(lines):
+    """
+    is_garbled_case for a batch of lines: upper/lower-case letters from two
+    text layers mixed.
+    """
+    flags = []
+    for cls in _class_strings(lines, LETTER_CASE_CLASSES):
+        if len(cls) < 8:
+            flags.append(False)
+            continue
+        flags.append((cls.count('Ul') + cls.count('lU')) / len(cls) > 0.30)
+    return flags
+
+
+def garble_scores(lines):
+    """[(digit_garbled, case_garbled)] for each line, same decisions as the single-line checks."""
+    lines = list(lines)
+    return list(zip(garbled_digit_flags(lines), garbled_case_flags(lines)))
+
+
+def is_garbled_digit(text):
+    """Detect digit-alpha interleaving: time chars mixed with title chars by x-position."""
+    return garbled_digit_flags([text])[0]
 
 
 def is_garbled_case(text):
     """Detect case-alternation garbling: uppercase/lowercase chars from two layers mixed."""
-    alpha = [c for c in text if c.isalpha()]
-    if len(alpha) < 8:
-        return False
-    changes = sum(1 for i in range(1, len(alpha)) if alpha[i].isupper() != alpha[i-1].isupper())
-    return changes / len(alpha) > 0.30
+    return garbled_case_flags([text])[0]
 
 
 def degarble_line(text):
@@ -131,19 +223,21 @@ def degarble_line(text):
     Remove interleaved time chars from a digit-garbled line.
     Strips digits, colons, dashes (PDF time overlay chars), returns clean title.
     """
-    cleaned = re.sub(r'[\d:–\-]', '', text)
-    cleaned = re.sub(r'  +', ' ', cleaned).strip()
+    cleaned = GARBLE_TIME_CHARS_RE.sub('', text)
+    cleaned = MULTI_SPACE_RE.sub(' ', cleaned).strip()
     if len(cleaned) >= 3 and sum(c.isalpha() for c in cleaned) >= 3:
         return cleaned
     return None
 
 
-def clean_cell_text(text):
+def clean_cell_text(text, overlapped=True):
     """Detect and fix garbled lines in cell text (PDF text-layer overlap artifacts)."""
+    if not overlapped:
+        return text
     lines = text.split('\n')
     clean = []
-    for line in lines:
-        if is_garbled_digit(line):
+    for line, garbled in zip(lines, garbled_digit_flags(lines)):
+        if garbled:
             fixed = degarble_line(line)
             if fixed:
                 clean.append(fixed)
@@ -153,222 +247,280 @@ def clean_cell_text(text):
     return '\n'.join(clean)
 
 
+def format_time(h1, m1, h2, m2):
+    return f"{int(h1):02d}:{m1}–{int(h2):02d}:{m2}"
+
+
 def normalize_time(t):
     m = TIME_RE.search(t)
     if m:
-        return f"{int(m.group(1)):02d}:{m.group(2)}–{int(m.group(3)):02d}:{m.group(4)}"
+        return format_time(*m.groups())
     return ""
 
 
-def parse_cell_text(text):
+def tokenize_cell(lines):
+    """
+    Lex stripped, non-empty cell lines into (kind, line, time) tokens, kind one
+    of TIME / TURNO / PROF / LOC / TEXT. time is (h1, m1, h2, m2) for a time
+    range, None otherwise (a lone "08:00" is a TIME token without one).
+    """
+    tokens = []
+    for line in lines:
+        m = (CELL_LINE_RE if ':' in line else CELL_TEXT_LINE_RE).match(line)
+        group = m.lastgroup if m else None
+        if group is None:
+            tokens.append(("TEXT", line, None))
+        elif group == "single":
+            tokens.append(("TIME", line, None))
+        elif group == "time":
+            tokens.append(("TIME", line, m.group("h1", "m1", "h2", "m2")))
+        else:
+            tokens.append((group.upper(), line, None))
+    return tokens
+
+
+# ── parse_cell_text rule table ────────────────────────────────────────────
+# Shortcut rules are tried in order against the upper-cased cell text; the
+# first match decides the activity. Literal keywords are looked up in the
+# hit set of one KEYWORDS scan (garble_keywords.PATTERNS["cell"]), the
+# remaining patterns are compiled here.
+
+# Garbled "Horário verde" after digit-stripping: "Horár io verde", "Hor àr io verde"
+HORARIO_VERDE_GARBLED_RE = re.compile(r'HOR.{0,5}IO\s+VERDE')
+# Garbled "SIMULADO GERAL": "SIMUML ADDOUL GOE RAL"
+SIM_GERAL_RE = re.compile(r'SIM\w*\s+\w*\s*GERAL')
+SIM_GO_RE = re.compile(r'SIM\w*\s+\w+\s+GO')
+# Degarbled "ATIVIDADE DE CONSOLID..." / "CONSOLID... E PERFORMA..." spread with spaces
+ATIVID_CONSOL_RE = re.compile(r'ATIVID\w*\s+DE\s+CONSOL')
+CONSOL_PERFORMA_RE = re.compile(r'CONSOL\w+\s+\w+\s+PERFORMA')
+PLANTAO_A_RE = re.compile(r'A\)\s*(\d+[:\.]?\d*)\s*[–\-]\s*(\d+[:\.]?\d*)')
+PLANTAO_B_RE = re.compile(r'B\)\s*(\d+[:\.]?\d*)\s*[–\-]\s*(\d+[:\.]?\d*)')
+# Garbled "Plantão HUV": "PlHanUtVão" → "H" and "U" and "V" scattered
+PLANTAO_GARBLED_RE = re.compile(r'PL.{0,3}N.{0,3}T')
+HUV_GARBLED_RE = re.compile(r'H.{0,3}U.{0,3}V')
+DIAGNOSTICO_GARBLED_RE = re.compile(r'N.{0,2}STI')
+# AMBU chars scattered: "AmDbrau.l ...", "APrMoBfaU...NlaE FRO"
+AMBU_GARBLED_RE = re.compile(r'A.{0,3}M.{0,3}B.{0,3}U')
+# Garbled SAÚDE MENTAL: "SaDr.d Ge aMberinetla l" → SA+D nearby AND M+N+T+L scattered
+SAUDE_GARBLED_RE = re.compile(r'SA.{0,5}D')
+MENTAL_GARBLED_RE = re.compile(r'M.{0,5}N.{0,3}T.{0,2}L')
+# Garbled C. DE SIMULAÇÕES: "C. dDe rSai.m Tuhalais ões" → C. + D+E+S+I+M scattered
+C_SIMULACOES_GARBLED_RE = re.compile(r'D.{0,3}E.{0,5}S.{0,3}I.{0,3}M')
+
+
+def _fixed(title, sub="", act_type="normal", loc="", time=""):
+    """Rule result: fixed fields, time from the cell text (else the given default)."""
+    def make(text, upper):
+        return {"title": title, "sub": sub, "time": normalize_time(text) or time,
+                "type": act_type, "loc": loc}
+    return make
+
+
+def _constant(title, act_type):
+    def make(text, upper):
+        return {"title": title, "sub": "", "time": "", "type": act_type, "loc": ""}
+    return make
+
+
+def _plantao(text, upper):
+    sub = ""
+    a_m = PLANTAO_A_RE.search(text)
+    b_m = PLANTAO_B_RE.search(text)
+    if a_m and b_m:
+        sub = f"A) {a_m.group(1)}–{a_m.group(2)} · B) {b_m.group(1)}–{b_m.group(2)}"
+    return {"title": "Plantão HUV" if "HUV" in upper else "Plantão",
+            "sub": sub, "time": normalize_time(text) or "08:00–18:00",
+            "type": "plantao", "loc": ""}
+
+
+def _ambulatorio_huv(text, upper):
+    sub_dr = ""
+    for _l in text.split('\n'):
+        if PROF_RE.match(_l.strip()):
+            sub_dr = _l.strip()
+            break
+    return {"title": "Ambulatório HUV", "sub": sub_dr,
+            "time": normalize_time(text) or "",
+            "type": "ambulatorio", "loc": "HUV"}
+
+
+def _is_consolidacao(hits, upper, text):
+    return bool(
+        "CONSOLIDAÇÃO" in hits or "CONSOLIDACAO" in hits or
+        ("PERFORMANCE" in hits and "EM CASA" in hits) or
+        (upper.startswith("ATIVIDADE") and ("CONSOLID" in hits or "PERFORMANCE" in hits)))
+
+
+def _is_consolidacao_garbled(hits, upper, text):
+    # Degarbled "Performance - EM CASA" may have spaces: "PERFORMA NCE - EM CASA";
+    # case-garbled "APetirvfiodramdaen dcee c -o EnMso CliAdSaA o e";
+    # degarbled fragments: "ATIVIDADE DE CONSOLID" spread with spaces
+    return bool(
+        ("PERFORMA" in hits and "EM CASA" in hits) or
+        "ENMSO CLIADSAA" in hits or "APETIRVFIO" in hits or
+        ATIVID_CONSOL_RE.search(upper) or CONSOL_PERFORMA_RE.search(upper))
+
+
+def _is_c_simulacoes(hits, upper, text):
+    # Check is_garbled_case on the first C. line only (multi-line cells may dilute transition rate)
+    for _l in text.split('\n'):
+        _ls = _l.strip()
+        if _ls.upper().startswith("C.") and len(_ls) > 4:
+            return bool(C_SIMULACOES_GARBLED_RE.search(_ls.upper()) and is_garbled_case(_ls))
+    return False
+
+
+# (name, fallback, test(hits, upper, text), make(text, upper)) — order matters.
+# fallback rules only recover garbled text; cells char_layers() found clean skip them.
+CELL_RULES = (
+    ("feriado", False, lambda h, u, t: "FERIADO" in h,
+     _constant("Feriado", "feriado")),
+    ("horario_verde", False, lambda h, u, t: "HORÁRIO VERDE" in h or "HORARIO VERDE" in h,
+     _constant("Horário Verde", "verde")),
+    ("horario_verde_garbled", True, lambda h, u, t: HORARIO_VERDE_GARBLED_RE.search(u),
+     _constant("Horário Verde", "verde")),
+    ("simulado_nacional", False, lambda h, u, t: "SIMULADO NACIONAL" in h or "MEDCOF" in h,
+     _fixed("Simulado Nacional MEDCOF", "Campus Universitário", "destaque",
+            "Campus Universitário", "13:00–18:00")),
+    ("simulado_geral", False, lambda h, u, t: "SIMULADO GERAL" in h,
+     _fixed("Simulado Geral do Módulo", "Campus Universitário", "destaque",
+            "Campus Universitário", "13:00–18:00")),
+    ("simulado_geral_garbled", True, lambda h, u, t: (SIM_GERAL_RE.search(u) or
+                                                      ("RAL" in h and SIM_GO_RE.search(u))),
+     _fixed("Simulado Geral do Módulo", "Campus Universitário", "destaque",
+            "Campus Universitário", "13:00–18:00")),
+    ("prova", False, lambda h, u, t: "PROVA" in h and ("MÓDULO" in h or "MODULO" in h),
+     _fixed("Prova do Módulo", "Campus Universitário", "prova", "Campus Universitário")),
+    ("consolidacao", False, _is_consolidacao,
+     _fixed("Consolidação e Performance", "Em Casa", "casa")),
+    ("consolidacao_garbled", True, _is_consolidacao_garbled,
+     _fixed("Consolidação e Performance", "Em Casa", "casa")),
+    ("plantao", False, lambda h, u, t: "PLANTÃO" in h or "PLANTAO" in h,
+     _plantao),
+    ("plantao_garbled", False, lambda h, u, t: (PLANTAO_GARBLED_RE.search(u) and
+                                         ("HUV" in h or HUV_GARBLED_RE.search(u))),
+     _fixed("Plantão HUV", act_type="plantao", time="08:00–18:00")),
+    ("diagnostico_imagem", False, lambda h, u, t: ("PRÁTICA DE DIAGNÓSTICO" in h or
+                                                   "PRATICA DE DIAGNOSTICO" in h or
+                                                   ("IMAGEM" in h and "DIAGNÓ" in h)),
+     _fixed("Prática de Diagnóstico por Imagem")),
+    ("diagnostico_imagem_garbled", True, lambda h, u, t: ("IMAGEM" in h and
+                                                          DIAGNOSTICO_GARBLED_RE.search(u)),
+     _fixed("Prática de Diagnóstico por Imagem")),
+    ("ambulatorio_huv", False, lambda h, u, t: (AMBU_GARBLED_RE.search(u) and
+                                         ("HUV" in h or HUV_GARBLED_RE.search(u))),
+     _ambulatorio_huv),
+    ("ambulatorio_nefro", False, lambda h, u, t: "FRO" in h and AMBU_GARBLED_RE.search(u),
+     _fixed("AMBULAT. DE NEFRO", act_type="ambulatorio")),
+    ("ambulatorio_geriatria", False, lambda h, u, t: "ERIATRIA" in h,
+     _fixed("AMBULAT. DE GERIATRIA", act_type="ambulatorio")),
+    ("saude_mental_garbled", False, lambda h, u, t: SAUDE_GARBLED_RE.search(u) and MENTAL_GARBLED_RE.search(u),
+     _fixed("Saúde Mental", act_type="saude_mental")),
+    ("c_simulacoes_garbled", True, _is_c_simulacoes,
+     _fixed("C. de Simulações", act_type="simulacao")),
+)
+
+# Activity type from the lower-cased title of a generally parsed cell, first match wins.
+# "enfer" / "ambu" / "aloj" also catch degarbled titles with extra spaces,
+# e.g. "Enfer ma ri a" (from "0E8n:0fe0r m0a 1r2i:0a0") still has "enfer".
+# Keywords: garble_keywords.PATTERNS["title"].
+TITLE_TYPE_RULES = (
+    ("enfermaria", lambda h, tl: "enfermaria" in h or (tl.startswith("enfer") and len(tl) < 20)),
+    # "ambu" covers ambulat / ambulatório / ambulatorio
+    ("ambulatorio", lambda h, tl: "ambu" in h),
+    ("alojamento", lambda h, tl: "aloj" in h),
+    ("simulacao", lambda h, tl: "c. de simulaç" in h or "centro de simula" in h),
+    ("saude_mental", lambda h, tl: "saúde mental" in h or "saude mental" in h),
+)
+
+
+def parse_cell_text(text, overlapped=True):
+    """Classify one cell's (cleaned) text into an activity dict, or None."""
     if not text or not text.strip():
         return None
     text = text.strip()
 
     # Pre-check: if entire text is case-garbled (no digits, but case alternation),
     # apply is_garbled_case. We only return None for truly unrecoverable garbling.
-    # The keyword shortcuts below will handle specific garbled patterns.
+    # The keyword shortcuts in CELL_RULES handle specific garbled patterns.
     upper = text.upper()
     if len(upper) < 3:
         return None
 
-    if "FERIADO" in upper:
-        return {"title": "Feriado", "sub": "", "time": "", "type": "feriado", "loc": ""}
-
-    if "HORÁRIO VERDE" in upper or "HORARIO VERDE" in upper:
-        return {"title": "Horário Verde", "sub": "", "time": "", "type": "verde", "loc": ""}
-    # Garbled "Horário verde" after digit-stripping: "Horár io verde", "Hor àr io verde"
-    # Pattern: HOR + any 0-5 chars + IO + space + VERDE
-    if re.search(r'HOR.{0,5}IO\s+VERDE', upper):
-        return {"title": "Horário Verde", "sub": "", "time": "", "type": "verde", "loc": ""}
-
-    if "SIMULADO NACIONAL" in upper or "MEDCOF" in upper:
-        return {"title": "Simulado Nacional MEDCOF", "sub": "Campus Universitário",
-                "time": normalize_time(text) or "13:00–18:00",
-                "type": "destaque", "loc": "Campus Universitário"}
-
-    # "SIMULADO GERAL" or garbled versions like "SIMUML ADDOUL GOE RAL"
-    if ("SIMULADO GERAL" in upper or
-            (re.search(r'SIM\w*\s+\w*\s*GERAL', upper)) or
-            (re.search(r'SIM\w*\s+\w+\s+GO', upper) and "RAL" in upper)):
-        return {"title": "Simulado Geral do Módulo", "sub": "Campus Universitário",
-                "time": normalize_time(text) or "13:00–18:00",
-                "type": "destaque", "loc": "Campus Universitário"}
-
-    if "PROVA" in upper and ("MÓDULO" in upper or "MODULO" in upper):
-        return {"title": "Prova do Módulo", "sub": "Campus Universitário",
-                "time": normalize_time(text) or "",
-                "type": "prova", "loc": "Campus Universitário"}
-
-    # "Consolidação e Performance" — also catches garbled/degarbled variants
-    if ("CONSOLIDAÇÃO" in upper or "CONSOLIDACAO" in upper or
-        # Degarbled "Performance - EM CASA" may have spaces: "PERFORMA NCE - EM CASA"
-        ("PERFORMA" in upper and "EM CASA" in upper) or
-        ("PERFORMANCE" in upper and "EM CASA" in upper) or
-        (upper.startswith("ATIVIDADE") and ("CONSOLID" in upper or "PERFORMANCE" in upper)) or
-        # Case-garbled: "APetirvfiodramdaen dcee c -o EnMso CliAdSaA o e"
-        "ENMSO CLIADSAA" in upper or "APETIRVFIO" in upper or
-        # Degarbled fragments: "ATIVIDADE DE CONSOLID" spread with spaces
-        (re.search(r'ATIVID\w*\s+DE\s+CONSOL', upper)) or
-        (re.search(r'CONSOL\w+\s+\w+\s+PERFORMA', upper))):
-        return {"title": "Consolidação e Performance", "sub": "Em Casa",
-                "time": normalize_time(text) or "",
-                "type": "casa", "loc": ""}
-
-    if "PLANTÃO" in upper or "PLANTAO" in upper:
-        sub = ""
-        a_m = re.search(r'A\)\s*(\d+[:\.]?\d*)\s*[–\-]\s*(\d+[:\.]?\d*)', text)
-        b_m = re.search(r'B\)\s*(\d+[:\.]?\d*)\s*[–\-]\s*(\d+[:\.]?\d*)', text)
-        if a_m and b_m:
-            sub = f"A) {a_m.group(1)}–{a_m.group(2)} · B) {b_m.group(1)}–{b_m.group(2)}"
-        return {"title": "Plantão HUV" if "HUV" in upper else "Plantão",
-                "sub": sub, "time": normalize_time(text) or "08:00–18:00",
-                "type": "plantao", "loc": ""}
-
-    # Garbled "Plantão HUV": "PlHanUtVão" → "H" and "U" and "V" scattered
-    if (re.search(r'PL.{0,3}N.{0,3}T', upper) and
-            (re.search(r'H.{0,3}U.{0,3}V', upper) or "HUV" in upper)):
-        return {"title": "Plantão HUV", "sub": "", "time": normalize_time(text) or "08:00–18:00",
-                "type": "plantao", "loc": ""}
-
-    # PRÁTICA DE DIAGNÓSTICO POR IMAGEM (also garbled variants with NÓSTI+IMAGEM fragments)
-    if ("PRÁTICA DE DIAGNÓSTICO" in upper or "PRATICA DE DIAGNOSTICO" in upper or
-            ("IMAGEM" in upper and re.search(r'N.{0,2}STI', upper)) or
-            ("IMAGEM" in upper and "DIAGNÓ" in upper)):
-        return {"title": "Prática de Diagnóstico por Imagem", "sub": "",
-                "time": normalize_time(text) or "",
-                "type": "normal", "loc": ""}
-
-    # Ambulatório HUV: clean entry OR garbled (AMBU chars + HUV scattered)
-    # Catches: clean "Ambulatório HUV", garbled "AmDbrau.l ...", "Dr. Name\nAmbulatório HUV"
-    if (re.search(r'A.{0,3}M.{0,3}B.{0,3}U', upper) and
-            (re.search(r'H.{0,3}U.{0,3}V', upper) or "HUV" in upper)):
-        sub_dr = ""
-        for _l in text.split('\n'):
-            if PROF_RE.match(_l.strip()):
-                sub_dr = _l.strip()
-                break
-        return {"title": "Ambulatório HUV", "sub": sub_dr,
-                "time": normalize_time(text) or "",
-                "type": "ambulatorio", "loc": "HUV"}
-
-    # Garbled AMBULAT. DE NEFRO: "APrMoBfaU...NlaE FRO" → AMBULAT chars + FRO end
-    if ("FRO" in upper and re.search(r'A.{0,3}M.{0,3}B.{0,3}U', upper)):
-        return {"title": "AMBULAT. DE NEFRO", "sub": "",
-                "time": normalize_time(text) or "",
-                "type": "ambulatorio", "loc": ""}
-
-    # Garbled AMBULAT. DE GERIATRIA: "ERIATRIA" appears scattered
-    if "ERIATRIA" in upper:
-        return {"title": "AMBULAT. DE GERIATRIA", "sub": "",
-                "time": normalize_time(text) or "",
-                "type": "ambulatorio", "loc": ""}
-
-    # Garbled SAÚDE MENTAL: "SaDr.d Ge aMberinetla l" → SA+D nearby AND M+N+T+L scattered
-    if (re.search(r'SA.{0,5}D', upper) and re.search(r'M.{0,5}N.{0,3}T.{0,2}L', upper)):
-        return {"title": "Saúde Mental", "sub": "",
-                "time": normalize_time(text) or "",
-                "type": "saude_mental", "loc": ""}
-
-    # Garbled C. DE SIMULAÇÕES: "C. dDe rSai.m Tuhalais ões" → C. + D+E+S+I+M scattered
-    # Check is_garbled_case on the first C. line only (multi-line cells may dilute transition rate)
-    _c_line = None
-    for _l in text.split('\n'):
-        _ls = _l.strip()
-        if _ls.upper().startswith("C.") and len(_ls) > 4:
-            _c_line = _ls
-            break
-    if (_c_line is not None and
-            re.search(r'D.{0,3}E.{0,5}S.{0,3}I.{0,3}M', _c_line.upper()) and
-            is_garbled_case(_c_line)):
-        return {"title": "C. de Simulações", "sub": "",
-                "time": normalize_time(text) or "",
-                "type": "simulacao", "loc": ""}
+    hits = KEYWORDS.scan(upper)
+    for _name, fallback, test, make in CELL_RULES:
+        if fallback and not overlapped:
+            continue
+        if test(hits, upper, text):
+            return make(text, upper)
 
     # ── General parsing: iterative title building ──────────────────────────
-    lines = [l.strip() for l in text.split('\n') if l.strip()]
     title_parts = []
     sub = ""
     time_str = ""
     loc = ""
     collecting_title = True
 
-    for line in lines:
-        # Single timestamp ("08:00") or turno marker ("Manhã – 08:00") → skip
-        if SINGLE_TIME_RE.match(line):
+    for kind, line, time in tokenize_cell(l.strip() for l in text.split('\n') if l.strip()):
+        # Timestamp, turno marker ("Manhã – 08:00") or time range: stops the title
+        if kind == "TIME" or kind == "TURNO":
+            if time and not time_str:
+                time_str = format_time(*time)
             collecting_title = False
             continue
-        if TURNO_LINE_RE.match(line):
-            collecting_title = False
-            continue
-        # Time range → extract and stop title collection
-        if TIME_RE.search(line):
-            if not time_str:
-                time_str = normalize_time(line)
-            collecting_title = False
-            continue
-
-        lc = line.strip()
-        if not lc:
-            continue
 
         if collecting_title:
-            if PROF_RE.match(lc):
+            if kind == "PROF":
                 # Professor/preceptor: ends title if we already have one
                 if title_parts:
                     collecting_title = False
                     if not sub:
-                        sub = lc
+                        sub = line
                 else:
                     # No title yet (PDF omitted activity name); use professor as fallback
-                    title_parts.append(lc)
+                    title_parts.append(line)
                     collecting_title = False
-            elif not lc[0].islower() and is_loc_line(lc):
+            elif kind == "LOC" and not line[0].islower():
                 # Location line (starts with uppercase): ends title
                 if title_parts:
                     collecting_title = False
                     if not loc:
-                        loc = lc
+                        loc = line
                 # If no title yet, unusual → skip
             else:
                 # Regular text (including lowercase continuations like "mulher", "Família")
-                title_parts.append(lc)
+                title_parts.append(line)
         else:
             # After title collection: gather sub and loc
-            if PROF_RE.match(lc) and not sub:
-                sub = lc
-            elif is_loc_line(lc) and not loc:
-                loc = lc
+            if kind == "PROF" and not sub:
+                sub = line
+            elif kind == "LOC" and not loc:
+                loc = line
 
+    # Title lines hold no time range of their own; only one split across two
+    # lines ("08:00 –" / "12:00 ...") can still turn up in the joined title.
     title = " ".join(title_parts)
-    title = TIME_RE.sub('', title).strip().rstrip(' –-')
-    title = re.sub(r'\s+', ' ', title).strip()
+    if len(title_parts) > 1 and ':' in title:
+        title = TIME_RE.sub('', title)
+    title = " ".join(title.strip().rstrip(' –-').split())
 
     if not title:
         return None
 
     tl = title.lower()
-    # Use "enfer" / "ambu" / "aloj" to also catch degarbled titles with extra spaces
-    # e.g. "Enfer ma ri a" (from "0E8n:0fe0r m0a 1r2i:0a0") still has "enfer"
-    if "enfermaria" in tl or (tl.startswith("enfer") and len(tl) < 20):
-        act_type = "enfermaria"
-    elif "ambulat" in tl or "ambu" in tl or "ambulatório" in tl or "ambulatorio" in tl:
-        act_type = "ambulatorio"
-    elif "aloj" in tl:
-        act_type = "alojamento"
-    elif "c. de simulaç" in tl or "centro de simula" in tl:
-        act_type = "simulacao"
-    elif "saúde mental" in tl or "saude mental" in tl:
-        act_type = "saude_mental"
-    else:
-        act_type = "normal"
+    title_hits = KEYWORDS.scan(tl)
+    act_type = "normal"
+    for name, test in TITLE_TYPE_RULES:
+        if test(title_hits, tl):
+            act_type = name
+            break
 
     return {"title": title, "sub": sub, "time": time_str, "type": act_type, "loc": loc}
 
 
-def get_column_x_ranges(table):
+def get_column_x_ranges(cells):
     """Get x-ranges for each grid column in a table, merging thin columns."""
-    xs = sorted(set(c[0] for c in table.cells) | set(c[2] for c in table.cells))
+    xs = sorted(set(c[0] for c in cells) | set(c[2] for c in cells))
 
     # Merge close x boundaries
     merged = [xs[0]]
@@ -387,7 +539,291 @@ def get_column_x_ranges(table):
     return ranges
 
 
-def find_day_mapping(page, x_ranges, all_cells):
+def get_row_boundaries(cells):
+    """Sorted y boundaries of a table's cells, dropping lines within 5pt of the previous."""
+    ys = sorted(set(c[1] for c in cells) | set(c[3] for c in cells))
+    merged_ys = [ys[0]]
+    for y in ys[1:]:
+        if y - merged_ys[-1] > 5:
+            merged_ys.append(y)
+    return merged_ys
+
+
+LIT_FORM = LIT("Form")
+
+
+def _hash_xobjects(h, resources, path=()):
+    """Feed h the /XObject resources by name: forms recursively (path guards cycles), images raw."""
+    xobjects = resolve1((resolve1(resources) or {}).get("XObject")) or {}
+    for name in sorted(xobjects, key=str):
+        xobj = resolve1(xobjects[name])
+        h.update(repr(name).encode("utf-8"))
+        if id(xobj) in path or not hasattr(xobj, "get_data"):
+            continue
+        if resolve1(xobj.get("Subtype")) is LIT_FORM:
+            h.update(repr((resolve1(xobj.get("BBox")), resolve1(xobj.get("Matrix")))).encode("utf-8"))
+            h.update(xobj.get_data())
+            _hash_xobjects(h, xobj.get("Resources"), path + (id(xobj),))
+        else:
+            h.update(xobj.get_rawdata() or b"")
+
+
+def page_content_digest(page):
+    """SHA-256 of a page's content stream(s), the XObjects they can draw and its box/rotation."""
+    h = hashlib.sha256(repr((page.mediabox, page.rotation)).encode("utf-8"))
+    for stream in page.page_obj.contents:
+        h.update(resolve1(stream).get_data())
+    _hash_xobjects(h, page.page_obj.resources)
+    return h.hexdigest()
+
+
+# Path-construction / XObject operators in a raw content stream
+PATH_OP_RE = re.compile(rb'(?<![^\s\]\)>])(re|m|l|c|v|y|Do)(?![^\s\[\(</])')
+# Every DAY_MAP key contains one of these once lowercased
+DAY_KEYWORDS = ('ª', 'feira', 'segunda', 'terça', 'terca', 'quarta', 'quinta',
+                'sexta', 'sábado', 'sabado')
+
+
+def prefilter_page(page, need_header):
+    """Cheap test run before find_tables(): a skip reason, or None if the page may hold a grid."""
+    ops = Counter(PATH_OP_RE.findall(
+        b"".join(resolve1(stream).get_data() for stream in page.page_obj.contents)))
+    # At most one rectangle and no other path or XObject: find_tables needs 2+ cells
+    if ops[b're'] <= 1 and sum(ops.values()) == ops[b're']:
+        return "no-rules"
+    chars = page.chars
+    if not chars:
+        return "no-text"
+    # No reference day columns yet, so find_day_mapping needs a weekday name here
+    if need_header:
+        text = "".join(c['text'] for c in chars).lower()
+        if not any(kw in text for kw in DAY_KEYWORDS):
+            return "no-header"
+    return None
+
+
+def page_stats_summary(stats):
+    skipped = {k.split(':', 1)[1]: n for k, n in sorted(stats.items()) if k.startswith('skipped:')}
+    detail = ", ".join(f"{reason}: {n}" for reason, n in skipped.items())
+    return (f"  Pages: {stats['pages']} scanned, {sum(skipped.values())} skipped "
+            f"before table detection" + (f" ({detail})" if detail else ""))
+
+
+def find_page_tables(page, geometry_cache=None):
+    """
+    Significant schedule tables of a page as [{"cells", "x_ranges", "ys"}], sorted by top y.
+    geometry_cache: optional PdfCache keyed by page_content_digest, skipping find_tables().
+    """
+    digest = None
+    if geometry_cache is not None:
+        digest = page_content_digest(page)
+        cached = geometry_cache.get_digest(digest, "tables")
+        if cached is not None:
+            return [{"cells": [tuple(c) for c in t["cells"]],
+                     "x_ranges": [tuple(r) for r in t["x_ranges"]],
+                     "ys": t["ys"]} for t in cached]
+
+    tables_found = page.find_tables()
+    tables = []
+    if tables_found:
+        # Collect significant tables (>= 15 cells), sorted by top y position
+        sig_tables = [t for t in tables_found if len(t.cells) >= 15]
+        if not sig_tables:
+            sig_tables = [max(tables_found, key=lambda t: len(t.cells))]
+        sig_tables.sort(key=lambda t: min(c[1] for c in t.cells))
+        for t in sig_tables:
+            tables.append({
+                "cells": [tuple(c) for c in t.cells],
+                "x_ranges": get_column_x_ranges(t.cells),
+                "ys": get_row_boundaries(t.cells),
+            })
+
+    if geometry_cache is not None:
+        geometry_cache.put_digest(digest, "tables", tables)
+    return tables
+
+
+def iter_pages(pdf, stream=True):
+    """Yield the PDF's pages, flushing each one's caches once the caller moves on (stream)."""
+    for page in pdf.pages:
+        yield page
+        if stream:
+            page.close()
+
+
+def peak_rss_summary(workers=False):
+    """Peak resident set size of this process (and pool workers), or "" if unknown."""
+    if resource is None:
+        return ""
+    # ru_maxrss is KB on Linux, bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    line = f"  Peak RSS: {own / (1024 * 1024):.1f} MB"
+    if workers:
+        worker = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+        line += f" (largest worker: {worker / (1024 * 1024):.1f} MB)"
+    return line
+
+
+class ColumnCellIndex:
+    """Per-column interval index over a table's cells, built once per table."""
+
+    def __init__(self, cells, x_ranges):
+        starts = [x0 for x0, _ in x_ranges]
+        ends = [x1 for _, x1 in x_ranges]
+        per_col = [[] for _ in x_ranges]
+        for c in cells:
+            if c[3] - c[1] <= 5:
+                continue
+            # Columns with x0 < cell.x1 and x1 > cell.x0
+            for ci in range(bisect_right(ends, c[0]), bisect_left(starts, c[2])):
+                per_col[ci].append(c)
+        self.cols = []
+        for col in per_col:
+            col.sort(key=lambda c: c[1])
+            self.cols.append((col, [c[1] for c in col], [round(c[1]) for c in col]))
+
+    def spans(self, ci, y0, y1, rounded=False):
+        """Sorted unique rounded (top, bottom) of column ci's cells within [y0, y1]."""
+        col, raw_tops, round_tops = self.cols[ci]
+        tops = round_tops if rounded else raw_tops
+        found = set()
+        for i in range(bisect_left(tops, y0), len(col)):
+            if tops[i] > y1:
+                break
+            c = col[i]
+            bottom = round(c[3]) if rounded else c[3]
+            if bottom <= y1:
+                found.add((round(c[1]), round(c[3])))
+        return sorted(found)
+
+
+# ── Char-layer separation ─────────────────────────────────────────────────
+# Garbled cells are two text layers ~2pt apart that chars_to_textmap merges into one line
+TEXTMAP_Y_TOLERANCE = 3    # chars_to_textmap's default line-merge tolerance
+LAYER_TOP_TOLERANCE = 0.5  # tops closer than this share a baseline
+
+
+def char_layers(chars):
+    """Split a cell's chars into (baseline, font, size) layers: (layers, overlapped in x)."""
+    layers = []
+    overlapped = False
+    line = []
+    for c in sorted(chars, key=lambda c: c['top']) + [None]:
+        if line and (c is None or c['top'] - line[-1]['top'] > TEXTMAP_Y_TOLERANCE):
+            by_key = {}
+            level = 0
+            prev_top = line[0]['top']
+            for lc in line:
+                if lc['top'] - prev_top > LAYER_TOP_TOLERANCE:
+                    level += 1
+                prev_top = lc['top']
+                key = (level, lc['fontname'].split('+')[-1], round(lc['size'], 1))
+                by_key.setdefault(key, []).append(lc)
+            spans = []
+            for ls in by_key.values():
+                xs = [(lc['x0'], lc['x1']) for lc in ls if lc['text'].strip()]
+                if xs:
+                    spans.append((min(x0 for x0, _ in xs), max(x1 for _, x1 in xs)))
+            spans.sort()
+            right = None
+            for x0, x1 in spans:
+                # Glyph boxes that merely touch (side-by-side layers) do not count
+                if right is not None and x0 < right - 0.5:
+                    overlapped = True
+                right = x1 if right is None else max(right, x1)
+            layers.extend(by_key.values())
+            line = []
+        if c is not None:
+            line.append(c)
+    return layers, overlapped
+
+
+class CropReader:
+    """Cell text via page.crop(...).extract_text() — the original engine."""
+
+    def __init__(self, page):
+        self.page = page
+
+    def text(self, bbox):
+        try:
+            return (self.page.crop(bbox).extract_text() or "").strip()
+        except:
+            return ""
+
+    def layered_text(self, bbox):
+        """(text, overlapped): text as text(), overlapped as char_layers()."""
+        try:
+            cropped = self.page.crop(bbox)
+            text = (cropped.extract_text() or "").strip()
+        except:
+            return "", False
+        return text, bool(text) and char_layers(cropped.chars)[1]
+
+
+class CharGridReader:
+    """Cell text from page.chars bucketed per (column, row band) once per table."""
+
+    def __init__(self, page, page_chars, x_ranges, ys):
+        self.page_bbox = page.bbox
+        self.chars = page_chars
+        self.x_ranges = x_ranges
+        self.ys = ys
+        # Bands: 0 = above ys[0], i = [ys[i-1], ys[i]], len(ys) = below ys[-1]
+        self.buckets = [[[] for _ in range(len(ys) + 1)] for _ in x_ranges]
+        for idx, c in enumerate(page_chars):
+            b0 = bisect_left(ys, c['top'])
+            b1 = bisect_right(ys, c['bottom'])
+            for ci, (x0, x1) in enumerate(x_ranges):
+                if c['x0'] <= x1 and c['x1'] >= x0:
+                    col = self.buckets[ci]
+                    for band in range(b0, b1 + 1):
+                        col[band].append(idx)
+
+    def cell_chars(self, bbox):
+        """The page chars clipped to bbox, in page order ([] if bbox is invalid)."""
+        try:
+            test_proposed_bbox(bbox, self.page_bbox)
+        except ValueError:
+            return []
+        x0, top, x1, bottom = bbox
+        b0 = bisect_left(self.ys, top)
+        b1 = bisect_right(self.ys, bottom)
+        candidates = set()
+        for ci, (cx0, cx1) in enumerate(self.x_ranges):
+            if x0 <= cx1 and x1 >= cx0:
+                col = self.buckets[ci]
+                for band in range(b0, b1 + 1):
+                    candidates.update(col[band])
+        # Keep page order so the textmap sees chars exactly as crop() would
+        chars = []
+        for idx in sorted(candidates):
+            clipped = clip_obj(self.chars[idx], bbox)
+            if clipped is not None:
+                chars.append(clipped)
+        return chars
+
+    def _join(self, chars, bbox):
+        if not chars:
+            return ""
+        x0, top, x1, bottom = bbox
+        textmap = chars_to_textmap(chars, layout_bbox=bbox,
+                                   layout_width=x1 - x0, layout_height=bottom - top)
+        return (textmap.as_string or "").strip()
+
+    def text(self, bbox):
+        return self._join(self.cell_chars(bbox), bbox)
+
+    def layered_text(self, bbox):
+        chars = self.cell_chars(bbox)
+        text = self._join(chars, bbox)
+        return text, bool(text) and char_layers(chars)[1]
+
+
+EXTRACT_ENGINES = ("chars", "crop")
+
+
+def find_day_mapping(reader, x_ranges, all_cells):
     """
     Determine which x_range corresponds to which day.
     Uses the header row text to identify day columns.
@@ -406,11 +842,7 @@ def find_day_mapping(page, x_ranges, all_cells):
     for ci, (x0, x1) in enumerate(x_ranges):
         if x1 - x0 < 10:
             continue
-        try:
-            cropped = page.crop((x0, y0, x1, y1))
-            text = (cropped.extract_text() or "").strip()
-        except:
-            text = ""
+        text = reader.text((x0, y0, x1, y1))
 
         text_lower = text.lower()
         if text in DAY_MAP:
@@ -455,17 +887,13 @@ def map_columns_by_x_position(x_ranges, ref_day_cols):
     return col_day_map
 
 
-def extract_row_cells(page, x_ranges, y0, y1):
-    """Extract text for each column in a row using exact cell cropping."""
+def extract_row_cells(reader, x_ranges, y0, y1):
+    """Extract text for each column in a row using exact cell bounds."""
     cells = {}
     for ci, (x0, x1) in enumerate(x_ranges):
         if x1 - x0 < 10:
             continue
-        try:
-            cropped = page.crop((x0 + 1, y0, x1 - 1, y1))
-            text = (cropped.extract_text() or "").strip()
-        except:
-            text = ""
+        text = reader.text((x0 + 1, y0, x1 - 1, y1))
         if text:
             cells[ci] = text
     return cells
@@ -492,46 +920,155 @@ def detect_week_number(wk_text, current_week):
     return None
 
 
-def extract_schedule(pdf_path, debug=False):
-    """Extract schedule from PDF."""
+class WeekCells:
+    """Cells of the weeks still being parsed; drain() hands out the finished ones."""
+
+    def __init__(self):
+        self.data = {}      # (week, day, turno) -> text, insertion order kept
+        self.by_week = {}   # week -> [(week, day, turno)]
+        self.overlapped = set()  # keys whose chars came from interleaved layers
+        self.appended = set()    # late keys (drained weeks) written with append=True
+        self.active = None
+        self.ready = []
+        self.drained = set()     # week numbers already handed out
+        self.reopened = 0
+
+    def add(self, key, text, append=False, overlapped=False):
+        """First write wins; append=True joins later text with a newline (PED blocks)."""
+        if key in self.data:
+            if not append:
+                return
+            self.data[key] += '\n' + text
+        else:
+            if key[0] in self.drained:
+                self.reopened += key[0] not in self.by_week
+                if append:
+                    self.appended.add(key)
+            self.data[key] = text
+            self.by_week.setdefault(key[0], []).append(key)
+        if overlapped:
+            self.overlapped.add(key)
+
+    def enter_week(self, wn):
+        """The parser moved to week wn: every other pending week is finished."""
+        if wn == self.active:
+            return
+        self.active = wn
+        for w in sorted(self.by_week):
+            if w != wn and w not in self.ready:
+                self.ready.append(w)
+
+    def drain(self):
+        """Yield (week, cells, overlapped, appended) per finished week (merge_week_cells)."""
+        ready, self.ready = self.ready, []
+        for w in ready:
+            cells, overlapped = {}, set()
+            # Late cells of a drained week: the keys to join onto its earlier text
+            appended = set() if w in self.drained else None
+            for key in self.by_week.pop(w):
+                cells[key[1:]] = self.data.pop(key)
+                if key in self.overlapped:
+                    self.overlapped.discard(key)
+                    overlapped.add(key[1:])
+                if key in self.appended:
+                    self.appended.discard(key)
+                    appended.add(key[1:])
+            self.drained.add(w)
+            yield w, cells, overlapped, appended
+
+    def finish(self):
+        """End of document: every week still pending is finished."""
+        self.active = None
+        self.ready = sorted(self.by_week)
+        yield from self.drain()
+
+
+def merge_week_cells(cell_data, wn, cells, appended=None):
+    """Merge drained cells of week wn into cell_data with WeekCells.add's rules."""
+    for (day, turno), text in cells.items():
+        key = (wn, day, turno)
+        if key not in cell_data:
+            cell_data[key] = text
+        elif appended and (day, turno) in appended:
+            cell_data[key] += '\n' + text
+
+
+def extract_cells(pdf_path, debug=False, engine="chars", geometry_cache=None, stats=None,
+                  stream=True, overlapped=None):
+    """
+    Stage 1 (geometry): the raw cell text of a PDF as {(week, day, turno): text}.
+    overlapped: optional set, receives the keys of cells with interleaved text layers.
+    """
+    cell_data = {}
+    for wn, week_cells, week_overlapped, appended in _scan_cells(
+            pdf_path, WeekCells(), debug=debug, engine=engine, geometry_cache=geometry_cache,
+            stats=stats, stream=stream):
+        merge_week_cells(cell_data, wn, week_cells, appended)
+        if overlapped is not None:
+            overlapped.update((wn, day, turno) for day, turno in week_overlapped)
+    return cell_data
+
+
+def _scan_cells(pdf_path, sink, debug=False, engine="chars", geometry_cache=None, stats=None,
+                stream=True):
+    """Generator behind extract_cells / extract_schedule_iter, yielding sink.drain() tuples."""
+    if engine not in EXTRACT_ENGINES:
+        raise ValueError(f"unknown extraction engine: {engine}")
     pdf = pdfplumber.open(pdf_path)
+    try:
+        yield from _scan_pages(pdf, sink, debug, engine, geometry_cache, stats, stream)
+    finally:
+        pdf.close()
+    if debug and sink.reopened:
+        print(f"  {sink.reopened} late update(s) to already yielded weeks", file=sys.stderr)
+    yield from sink.finish()
 
+
+def _scan_pages(pdf, sink, debug, engine, geometry_cache, stats, stream):
     # Reference day column info: day_name -> x_center
     ref_day_centers = {}
     ref_week_col = None
     ref_turno_col = None  # For PED format with explicit turno column
 
-    # All extracted data: (week, day, turno) -> text
-    cell_data = {}
+    # All extracted data goes to sink: (week, day, turno) -> text
     current_week = None
     ped_active_turno = None  # Persists across tables for PED-style
 
-    for page_idx, page in enumerate(pdf.pages):
-        tables_found = page.find_tables()
-        if not tables_found:
+    page_chars = reader = None
+    for page_idx, page in enumerate(iter_pages(pdf, stream)):
+        # Drop the previous page's chars before this page is parsed
+        page_chars = reader = None
+        if stats is not None:
+            stats['pages'] += 1
+        skip = prefilter_page(page, need_header=not ref_day_centers)
+        if skip:
+            if stats is not None:
+                stats['skipped:' + skip] += 1
+            if debug:
+                print(f"  Page {page_idx+1}: skipped ({skip})", file=sys.stderr)
             continue
 
-        # Collect significant tables (>= 15 cells), sorted by top y position
-        sig_tables = [t for t in tables_found if len(t.cells) >= 15]
+        sig_tables = find_page_tables(page, geometry_cache)
         if not sig_tables:
-            sig_tables = [max(tables_found, key=lambda t: len(t.cells))]
-        sig_tables.sort(key=lambda t: min(c[1] for c in t.cells))
+            continue
+
+        page_chars = page.chars if engine == "chars" else None
 
         for table_idx, main_table in enumerate(sig_tables):
-            x_ranges = get_column_x_ranges(main_table)
+            table_cells = main_table["cells"]
+            x_ranges = main_table["x_ranges"]
+            merged_ys = main_table["ys"]
 
             if debug:
                 print(f"  Page {page_idx+1} table {table_idx}: {len(x_ranges)} cols, x_ranges={[(round(a), round(b)) for a, b in x_ranges]}", file=sys.stderr)
 
-            # Get y boundaries
-            ys = sorted(set(c[1] for c in main_table.cells) | set(c[3] for c in main_table.cells))
-            merged_ys = [ys[0]]
-            for y in ys[1:]:
-                if y - merged_ys[-1] > 5:
-                    merged_ys.append(y)
+            if engine == "chars":
+                reader = CharGridReader(page, page_chars, x_ranges, merged_ys)
+            else:
+                reader = CropReader(page)
 
             # Determine day mapping
-            col_day_map, week_col, turno_col = find_day_mapping(page, x_ranges, main_table.cells)
+            col_day_map, week_col, turno_col = find_day_mapping(reader, x_ranges, table_cells)
 
             if col_day_map:
                 # Store reference centers
@@ -576,17 +1113,9 @@ def extract_schedule(pdf_path, debug=False):
                     wk_text = ""
                     turno_text = ""
                     if week_col is not None:
-                        try:
-                            cropped = page.crop((x_ranges[week_col][0]+1, y0, x_ranges[week_col][1]-1, y1))
-                            wk_text = (cropped.extract_text() or "").strip()
-                        except:
-                            pass
+                        wk_text = reader.text((x_ranges[week_col][0]+1, y0, x_ranges[week_col][1]-1, y1))
                     if turno_col is not None:
-                        try:
-                            cropped = page.crop((x_ranges[turno_col][0]+1, y0, x_ranges[turno_col][1]-1, y1))
-                            turno_text = (cropped.extract_text() or "").strip()
-                        except:
-                            pass
+                        turno_text = reader.text((x_ranges[turno_col][0]+1, y0, x_ranges[turno_col][1]-1, y1))
 
                     # PED week: standalone number only (avoid matching dates like "09/3")
                     wn = None
@@ -657,19 +1186,13 @@ def extract_schedule(pdf_path, debug=False):
                 for wn, turno, block_y0, block_y1 in blocks:
                     if wn > 10:
                         continue
+                    sink.enter_week(wn)
+                    yield from sink.drain()
                     for ci, day in col_day_map.items():
                         x0, x1 = x_ranges[ci]
-                        try:
-                            cropped = page.crop((x0 + 1, block_y0, x1 - 1, block_y1))
-                            text = (cropped.extract_text() or "").strip()
-                        except:
-                            text = ""
+                        text, layered = reader.layered_text((x0 + 1, block_y0, x1 - 1, block_y1))
                         if text:
-                            key = (wn, day, turno)
-                            if key not in cell_data:
-                                cell_data[key] = text
-                            else:
-                                cell_data[key] += '\n' + text
+                            sink.add((wn, day, turno), text, append=True, overlapped=layered)
 
             else:
                 # ═══ CM/GO-style: no turno column ═══════════════════════════
@@ -679,6 +1202,7 @@ def extract_schedule(pdf_path, debug=False):
                 day_col_indices = sorted(col_day_map.keys())
                 if not day_col_indices:
                     continue
+                cell_index = ColumnCellIndex(table_cells, x_ranges)
 
                 # Pass 1: detect week-number → y_start within this table
                 week_y_starts_local = {}  # wn -> first y where it appears
@@ -686,7 +1210,7 @@ def extract_schedule(pdf_path, debug=False):
                     y0, y1 = merged_ys[yi], merged_ys[yi + 1]
                     if y1 - y0 < 5:
                         continue
-                    row_cells = extract_row_cells(page, x_ranges, y0, y1)
+                    row_cells = extract_row_cells(reader, x_ranges, y0, y1)
                     wk_text = ""
                     if week_col is not None and week_col in row_cells:
                         wk_text = row_cells[week_col]
@@ -707,13 +1231,8 @@ def extract_schedule(pdf_path, debug=False):
                 if not week_y_starts_local:
                     continue
 
-                # Pre-compute cells for reference day column (middle column for robustness)
+                # Reference day column (middle column for robustness)
                 ref_ci = day_col_indices[len(day_col_indices) // 2]
-                ref_x0, ref_x1 = x_ranges[ref_ci]
-                ref_col_cells_all = sorted(set(
-                    (round(c[1]), round(c[3])) for c in main_table.cells
-                    if c[0] < ref_x1 and c[2] > ref_x0 and c[3] - c[1] > 5
-                ))
 
                 # Pass 2: for each week group, extract Manhã and Tarde
                 sorted_local = sorted(week_y_starts_local.keys())
@@ -722,6 +1241,8 @@ def extract_schedule(pdf_path, debug=False):
                 for idx, wn in enumerate(sorted_local):
                     if wn > 10:
                         continue
+                    sink.enter_week(wn)
+                    yield from sink.drain()
                     wg_y0 = week_y_starts_local[wn]
                     wg_y1 = week_y_starts_local[sorted_local[idx + 1]] if idx + 1 < len(sorted_local) else page_bottom
 
@@ -729,20 +1250,12 @@ def extract_schedule(pdf_path, debug=False):
                         print(f"    week {wn}: y=[{round(wg_y0)},{round(wg_y1)}]", file=sys.stderr)
 
                     # Find cells of reference column within this week group
-                    cells_in_group = sorted(
-                        (cy0, cy1) for cy0, cy1 in ref_col_cells_all
-                        if cy0 >= wg_y0 - 2 and cy1 <= wg_y1 + 2
-                    )
+                    cells_in_group = cell_index.spans(ref_ci, wg_y0 - 2, wg_y1 + 2, rounded=True)
 
                     # If reference column has no cells, try all day columns
                     if not cells_in_group:
                         for ci in day_col_indices:
-                            dcx0, dcx1 = x_ranges[ci]
-                            dc = sorted(set(
-                                (round(c[1]), round(c[3])) for c in main_table.cells
-                                if c[0] < dcx1 and c[2] > dcx0 and c[3] - c[1] > 5
-                                and c[1] >= wg_y0 - 2 and c[3] <= wg_y1 + 2
-                            ))
+                            dc = cell_index.spans(ci, wg_y0 - 2, wg_y1 + 2)
                             if dc:
                                 cells_in_group = dc
                                 break
@@ -759,70 +1272,262 @@ def extract_schedule(pdf_path, debug=False):
                     # Extract Manhã
                     for ci, day in col_day_map.items():
                         cx0, cx1 = x_ranges[ci]
-                        try:
-                            text = (page.crop((cx0 + 1, wg_y0, cx1 - 1, manha_y_end)).extract_text() or "").strip()
-                        except:
-                            text = ""
+                        text, layered = reader.layered_text((cx0 + 1, wg_y0, cx1 - 1, manha_y_end))
                         if text:
-                            key = (wn, day, 'Manhã')
-                            if key not in cell_data:
-                                cell_data[key] = text
+                            sink.add((wn, day, 'Manhã'), text, overlapped=layered)
 
                     # Extract Tarde (only if there's meaningful space below Manhã)
                     if manha_y_end < wg_y1 - 5:
                         for ci, day in col_day_map.items():
                             cx0, cx1 = x_ranges[ci]
-                            try:
-                                text = (page.crop((cx0 + 1, manha_y_end, cx1 - 1, wg_y1)).extract_text() or "").strip()
-                            except:
-                                text = ""
+                            text, layered = reader.layered_text((cx0 + 1, manha_y_end, cx1 - 1, wg_y1))
                             if text:
-                                key = (wn, day, 'Tarde')
-                                if key not in cell_data:
-                                    cell_data[key] = text
+                                sink.add((wn, day, 'Tarde'), text, overlapped=layered)
 
-    pdf.close()
 
-    # Build week structures
-    weeks = {}
-    for (wn, day, turno), text in cell_data.items():
-        text = clean_cell_text(text)
-        parsed = parse_cell_text(text)
+def cells_to_json(cell_data, overlapped=()):
+    """cell_data → JSON-safe [[week, day, turno, text, overlapped], ...] (insertion order kept)."""
+    return [[wn, day, turno, text, (wn, day, turno) in overlapped]
+            for (wn, day, turno), text in cell_data.items()]
+
+
+def cells_from_json(rows):
+    """Rows of cells_to_json → (cell_data, overlapped keys)."""
+    cell_data = {}
+    overlapped = set()
+    for wn, day, turno, text, layered in rows:
+        cell_data[(wn, day, turno)] = text
+        if layered:
+            overlapped.add((wn, day, turno))
+    return cell_data, overlapped
+
+
+# Distinct raw cell texts kept by classify_cell (the full corpus has ~800)
+CLASSIFY_CACHE_SIZE = 4096
+
+
+# Cells classified per char_layers() verdict: "clean" ones skip the garble fallbacks
+LAYER_STATS = Counter()
+
+
+@functools.lru_cache(maxsize=CLASSIFY_CACHE_SIZE)
+def _classify_cell(raw, overlapped):
+    return parse_cell_text(clean_cell_text(raw, overlapped), overlapped)
+
+
+def classify_cell(raw, overlapped=True):
+    """clean_cell_text + parse_cell_text through a process-wide LRU; returns a copy callers may edit."""
+    parsed = _classify_cell(raw, overlapped)
+    return dict(parsed) if parsed else None
+
+
+def classify_cache_summary():
+    """classify_cell's hit-rate line, None if nothing went through it."""
+    info = _classify_cell.cache_info()
+    lookups = info.hits + info.misses
+    if not lookups:
+        return None
+    rate = f" ({100 * info.hits / lookups:.1f}% hit rate)"
+    return (f"  Cell classification: {lookups} lookups, {info.hits} hits{rate}, "
+            f"{info.currsize}/{info.maxsize} cached")
+
+
+class ClassifiedCells(dict):
+    """Run-wide {(raw text, layered): parsed or None}, filled by classify_cells."""
+
+    def __init__(self):
+        super().__init__()
+        self.cells = 0
+        self.seconds = 0.0
+
+    def summary(self):
+        saved = self.cells - len(self)
+        rate = f" ({100 * saved / self.cells:.1f}% deduplicated)" if self.cells else ""
+        return (f"  Cell texts: {self.cells} cells, {len(self)} unique{rate}, "
+                f"classified in {self.seconds * 1000:.1f} ms")
+
+
+def classify_cells(cells, classified=None):
+    """Classify each distinct (raw text, layered) pair of cells once into classified (returned)."""
+    classified = ClassifiedCells() if classified is None else classified
+    t0 = time.perf_counter()
+    for key in cells:
+        classified.cells += 1
+        if key not in classified:
+            text, layered = key
+            classified[key] = parse_cell_text(clean_cell_text(text, layered), layered)
+    classified.seconds += time.perf_counter() - t0
+    return classified
+
+
+def cell_keys(cell_data, overlapped=None):
+    """(raw text, layered) of every cell in cell_data, as build_weeks classifies them."""
+    return [(text, overlapped is None or key in overlapped) for key, text in cell_data.items()]
+
+
+def layer_stats_summary():
+    clean, overlapped = LAYER_STATS["clean"], LAYER_STATS["overlapped"]
+    return (f"  Char layers: {clean} clean cells skipped the garble fallbacks, "
+            f"{overlapped} overlapped")
+
+
+DAY_ORDER = {'2ª': 0, '3ª': 1, '4ª': 2, '5ª': 3, '6ª': 4, 'Sáb': 5}
+TURNO_ORDER = {'Manhã': 0, 'Tarde': 1}
+
+
+def build_week(wn, week_cells, overlapped=None, classified=None):
+    """Classify one week's {(day, turno): text}; None if no cell yields an activity."""
+    acts = []
+    for (day, turno), text in week_cells.items():
+        layered = overlapped is None or (day, turno) in overlapped
+        LAYER_STATS["overlapped" if layered else "clean"] += 1
+        if classified is None:
+            parsed = classify_cell(text, layered)
+        else:
+            parsed = classified[(text, layered)]
+            parsed = dict(parsed) if parsed else None
         if parsed:
-            if wn not in weeks:
-                weeks[wn] = []
-            weeks[wn].append({"day": day, "turno": turno, **parsed})
+            acts.append({"day": day, "turno": turno, **parsed})
+    if not acts:
+        return None
 
-    # Sort and format
-    result = []
-    day_order = {'2ª': 0, '3ª': 1, '4ª': 2, '5ª': 3, '6ª': 4, 'Sáb': 5}
-    turno_order = {'Manhã': 0, 'Tarde': 1}
-
-    for wn in sorted(weeks.keys()):
-        acts = weeks[wn]
-        acts.sort(key=lambda a: (day_order.get(a['day'], 9), turno_order.get(a['turno'], 9)))
-        for i, a in enumerate(acts, 1):
-            a['id'] = f"{wn}-{i}"
-        result.append({
-            "num": wn,
-            "dates": WEEK_DATES.get(wn, ""),
-            "activities": acts,
-        })
+    acts.sort(key=lambda a: (DAY_ORDER.get(a['day'], 9), TURNO_ORDER.get(a['turno'], 9)))
+    for i, a in enumerate(acts, 1):
+        a['id'] = f"{wn}-{i}"
+    return {
+        "num": wn,
+        "dates": WEEK_DATES.get(wn, ""),
+        "activities": acts,
+    }
+
+
+def build_weeks(cell_data, overlapped=None, classified=None):
+    """Stage 2 (classification): cell_data → sorted week list with activity dicts."""
+    by_week = {}
+    for (wn, day, turno), text in cell_data.items():
+        by_week.setdefault(wn, {})[(day, turno)] = text
 
+    result = []
+    for wn in sorted(by_week.keys()):
+        week_overlapped = None
+        if overlapped is not None:
+            week_overlapped = {(day, turno) for w, day, turno in overlapped if w == wn}
+        week = build_week(wn, by_week[wn], week_overlapped, classified)
+        if week:
+            result.append(week)
     return result
 
 
-def process_materia(materia_id, debug=False):
+def extract_schedule(pdf_path, debug=False, engine="chars", geometry_cache=None, stream=True):
+    """Extract schedule from PDF (stage 1 + stage 2)."""
+    overlapped = set()
+    cell_data = extract_cells(pdf_path, debug=debug, engine=engine,
+                              geometry_cache=geometry_cache, stream=stream, overlapped=overlapped)
+    return build_weeks(cell_data, overlapped)
+
+
+def extract_schedule_iter(pdf_path, debug=False, engine="chars", geometry_cache=None, stream=True):
+    """extract_schedule one week at a time; late cells of a yielded week come "partial"."""
+    sink = WeekCells()
+    for wn, week_cells, overlapped, appended in _scan_cells(
+            pdf_path, sink, debug=debug, engine=engine, geometry_cache=geometry_cache,
+            stream=stream):
+        week = build_week(wn, week_cells, overlapped)
+        if week:
+            if appended is not None:
+                week["partial"] = True
+            yield week
+
+
+def _extract_job(pdf_path, kwargs):
+    """Pool worker: extract_cells plus its captured stderr and the worker's cache/page counters."""
+    geometry_cache = kwargs.get('geometry_cache')
+    if geometry_cache is not None:
+        geometry_cache.reset_stats()
+    page_stats = Counter()
+    overlapped = set()
+    buf = io.StringIO()
+    with contextlib.redirect_stderr(buf):
+        cell_data = extract_cells(pdf_path, stats=page_stats, overlapped=overlapped, **kwargs)
+    geometry_stats = geometry_cache.stats() if geometry_cache is not None else None
+    return cell_data, overlapped, buf.getvalue(), page_stats, geometry_stats
+
+
+def _run_extract(pdf_paths, jobs, page_stats, kwargs):
+    if jobs <= 1:
+        for path in pdf_paths:
+            overlapped = set()
+            yield extract_cells(path, stats=page_stats, overlapped=overlapped, **kwargs), overlapped, ""
+        return
+    geometry_cache = kwargs.get('geometry_cache')
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(_extract_job, path, kwargs) for path in pdf_paths]
+        for fut in futures:
+            cell_data, overlapped, log, worker_pages, geometry_stats = fut.result()
+            if page_stats is not None:
+                page_stats.update(worker_pages)
+            if geometry_stats is not None:
+                geometry_cache.add_stats(geometry_stats)
+            yield cell_data, overlapped, log
+
+
+def extract_schedules(pdf_paths, jobs=1, cache=None, page_stats=None, classified=None,
+                      **kwargs):
+    """
+    extract_schedule over several PDFs (in a pool with jobs > 1), yielding (weeks, log) in order.
+    cache: optional PdfCache of stage-1 cells; unchanged PDFs are not reopened (unless debug).
+    """
+    classified = ClassifiedCells() if classified is None else classified
+    kind = f"cells:{kwargs.get('engine', 'chars')}"
+    cached = {}
+    if cache is not None and not kwargs.get('debug'):
+        for i, path in enumerate(pdf_paths):
+            rows = cache.get(path, kind)
+            if rows is not None:
+                cached[i] = cells_from_json(rows)
+    computed = _run_extract([p for i, p in enumerate(pdf_paths) if i not in cached],
+                            jobs, page_stats, kwargs)
+    for i, path in enumerate(pdf_paths):
+        if i in cached:
+            (cell_data, overlapped), log = cached[i], ""
+        else:
+            cell_data, overlapped, log = next(computed)
+            if cache is not None:
+                cache.put(path, kind, cells_to_json(cell_data, overlapped))
+        # Only this PDF's new texts are classified; pool workers keep extracting meanwhile
+        classify_cells(cell_keys(cell_data, overlapped), classified)
+        yield build_weeks(cell_data, overlapped, classified), log
+
+
+def materia_pdf_paths(materia_id):
+    """[(group, filepath or None)] for a matéria, in group order."""
     config = MATERIA_PATHS[materia_id]
-    result = {}
+    paths = []
     for g in config['groups']:
-        filename = config['pattern'].format(g=g)
-        filepath = os.path.join(config['dir'], filename)
-        if not os.path.exists(filepath):
-            print(f"  [SKIP] {filename}", file=sys.stderr)
+        filepath = os.path.join(config['dir'], config['pattern'].format(g=g))
+        paths.append((g, filepath if os.path.exists(filepath) else None))
+    return paths
+
+
+def process_materia(materia_id, debug=False, engine="chars", jobs=1, cache=None, extracted=None):
+    """
+    Parse every group PDF of a matéria.
+    extracted: optional extract_schedules() iterator shared across matérias,
+    so a single pool can cover a whole `all` run.
+    """
+    config = MATERIA_PATHS[materia_id]
+    paths = materia_pdf_paths(materia_id)
+    if extracted is None:
+        extracted = extract_schedules([fp for _, fp in paths if fp], jobs=jobs, cache=cache,
+                                      debug=debug, engine=engine)
+    result = {}
+    for g, filepath in paths:
+        if not filepath:
+            print(f"  [SKIP] {config['pattern'].format(g=g)}", file=sys.stderr)
             continue
         print(f"  Group {g}", file=sys.stderr)
-        weeks = extract_schedule(filepath, debug=debug)
+        weeks, log = next(extracted)
+        sys.stderr.write(log)
         total = sum(len(w['activities']) for w in weeks)
         print(f"    {len(weeks)} weeks, {total} activities", file=sys.stderr)
         result[g] = weeks
@@ -835,24 +1540,61 @@ def main():
     parser.add_argument('materia', choices=['cm', 'go', 'ped', 'all'])
     parser.add_argument('--group', type=int)
     parser.add_argument('--debug', action='store_true')
+    parser.add_argument('--engine', choices=EXTRACT_ENGINES, default='chars',
+                        help='Cell text engine: bucketed page.chars (default) or per-cell page.crop')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Parse group PDFs in N worker processes (output is identical)')
+    parser.add_argument('--no-stream', action='store_true',
+                        help='Keep every page\'s parsed objects until the PDF is closed')
+    add_cache_args(parser)
     args = parser.parse_args()
+    cache = PdfCache.from_args(args, EXTRACTOR_VERSION)
+    geometry_cache = PdfCache.from_args(args, GEOMETRY_VERSION)
+    page_stats = Counter()
+    classified = ClassifiedCells()
 
     materias = ['cm', 'go', 'ped'] if args.materia == 'all' else [args.materia]
     all_results = {}
 
+    # One pool across every matéria so a full run keeps all workers busy
+    extracted = None
+    if not args.group:
+        all_paths = [fp for mid in materias for _, fp in materia_pdf_paths(mid) if fp]
+        extracted = extract_schedules(all_paths, jobs=args.jobs, cache=cache,
+                                      page_stats=page_stats, classified=classified,
+                                      geometry_cache=geometry_cache,
+                                      debug=args.debug, engine=args.engine,
+                                      stream=not args.no_stream)
+
     for mid in materias:
         print(f"\n=== {mid.upper()} ===", file=sys.stderr)
         if args.group:
             config = MATERIA_PATHS[mid]
             filepath = os.path.join(config['dir'], config['pattern'].format(g=args.group))
             if os.path.exists(filepath):
-                weeks = extract_schedule(filepath, debug=args.debug)
+                weeks, _ = next(extract_schedules([filepath], cache=cache, page_stats=page_stats,
+                                                  classified=classified,
+                                                  geometry_cache=geometry_cache,
+                                                  debug=args.debug, engine=args.engine,
+                                                  stream=not args.no_stream))
                 all_results[mid] = {args.group: weeks}
                 total = sum(len(w['activities']) for w in weeks)
                 print(f"  G{args.group}: {len(weeks)} wks, {total} acts", file=sys.stderr)
         else:
-            all_results[mid] = process_materia(mid, debug=args.debug)
-
+            all_results[mid] = process_materia(mid, debug=args.debug, engine=args.engine,
+                                               extracted=extracted)
+
+    if extracted is not None:
+        extracted.close()  # joins pool workers
+    print(cache.summary(), file=sys.stderr)
+    print(geometry_cache.summary("Geometry cache"), file=sys.stderr)
+    print(page_stats_summary(page_stats), file=sys.stderr)
+    print(classified.summary(), file=sys.stderr)
+    if classify_cache_summary():
+        print(classify_cache_summary(), file=sys.stderr)
+    print(layer_stats_summary(), file=sys.stderr)
+    if peak_rss_summary():
+        print(peak_rss_summary(workers=args.jobs > 1), file=sys.stderr)
     print(json.dumps(all_results, ensure_ascii=False, indent=2))
 
 
@@ -0,0 +1,139 @@
+"""
+Content-addressed on-disk cache for PDF extraction results.
+
+Entries are keyed by the SHA-256 of the PDF bytes, a parser version string
+and a "kind" (what was computed from the PDF), so an unchanged PDF is never
+re-parsed and a parser change invalidates everything at once.
+
+Used by parse_pdfs.py, parse_cc.py and the compare scripts, e.g. for the
+stage-1 cells of parse_pdfs.extract_cells:
+    cache = PdfCache.from_args(args, EXTRACTOR_VERSION)
+
+    def compute():
+        overlapped = set()
+        return cells_to_json(extract_cells(pdf_path, overlapped=overlapped), overlapped)
+    cell_data, overlapped = cells_from_json(cache.fetch(pdf_path, "cells:chars", compute))
+    print(cache.summary(), file=sys.stderr)
+"""
+import hashlib
+import json
+import os
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".pdf_cache")
+
+
+def format_bytes(n):
+    if n < 1024:
+        return f"{n} B"
+    if n < 1024 * 1024:
+        return f"{n / 1024:.1f} KB"
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+def add_cache_args(parser):
+    """Add --no-cache / --rebuild-cache to an argparse parser."""
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Do not read or write the PDF extraction cache')
+    parser.add_argument('--rebuild-cache', action='store_true',
+                        help='Ignore cached entries and overwrite them with fresh results')
+
+
+class PdfCache:
+    """JSON entries under CACHE_DIR, one file per (pdf hash, version, kind)."""
+
+    def __init__(self, version, cache_dir=CACHE_DIR, enabled=True, rebuild=False):
+        self.version = version
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.rebuild = rebuild
+        self.hits = 0
+        self.misses = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._digests = {}
+
+    @classmethod
+    def from_args(cls, args, version):
+        return cls(version, enabled=not args.no_cache, rebuild=args.rebuild_cache)
+
+    def pdf_digest(self, pdf_path):
+        """SHA-256 of the PDF bytes (memoized per path for the run)."""
+        if pdf_path not in self._digests:
+            h = hashlib.sha256()
+            with open(pdf_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+            self._digests[pdf_path] = h.hexdigest()
+        return self._digests[pdf_path]
+
+    def entry_path(self, digest, kind):
+        key = hashlib.sha256(
+            f"{digest}\0{self.version}\0{kind}".encode("utf-8")
+        ).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def get(self, pdf_path, kind):
+        """Cached value or None. Counts a miss when nothing usable is stored."""
+        if not self.enabled:
+            return None
+        return self.get_digest(self.pdf_digest(pdf_path), kind)
+
+    def put(self, pdf_path, kind, value):
+        if not self.enabled:
+            return
+        self.put_digest(self.pdf_digest(pdf_path), kind, value)
+
+    def get_digest(self, digest, kind):
+        """Like get(), keyed by any content digest (e.g. a page content stream)."""
+        if not self.enabled:
+            return None
+        path = self.entry_path(digest, kind)
+        if self.rebuild or not os.path.exists(path):
+            self.misses += 1
+            return None
+        with open(path, "rb") as f:
+            raw = f.read()
+        self.hits += 1
+        self.bytes_read += len(raw)
+        return json.loads(raw.decode("utf-8"))
+
+    def put_digest(self, digest, kind, value):
+        if not self.enabled:
+            return
+        path = self.entry_path(digest, kind)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        raw = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(raw)
+        os.replace(tmp, path)
+        self.bytes_written += len(raw)
+
+    def fetch(self, pdf_path, kind, compute):
+        """get(), or compute() and put() on a miss."""
+        value = self.get(pdf_path, kind)
+        if value is None:
+            value = compute()
+            self.put(pdf_path, kind, value)
+        return value
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "bytes_read": self.bytes_read, "bytes_written": self.bytes_written}
+
+    def reset_stats(self):
+        self.hits = self.misses = self.bytes_read = self.bytes_written = 0
+
+    def add_stats(self, stats):
+        """Merge counters collected by a copy of this cache in a worker process."""
+        self.hits += stats["hits"]
+        self.misses += stats["misses"]
+        self.bytes_read += stats["bytes_read"]
+        self.bytes_written += stats["bytes_written"]
+
+    def summary(self, label="Cache"):
+        if not self.enabled:
+            return f"  {label}: disabled"
+        return (f"  {label}: {self.hits} hits, {self.misses} misses, "
+                f"{format_bytes(self.bytes_read)} read, "
+                f"{format_bytes(self.bytes_written)} written ({self.cache_dir})")
@@ -0,0 +1,207 @@
+"""
+Declarative post-processing rules for parsed activities (e.g. cc_rules.json).
+
+A rule file is a JSON object with an ordered "rules" list. Each activity is
+run through the rules in order; a rule fires when any clause of its "when"
+list holds, and by default ("stop": true) ends processing of that activity,
+like the `continue`s of the old if-chain.
+
+Clause keys (all keys of one clause must hold):
+    all / any / none   keywords of the title's garble_keywords scan (upper-cased)
+    title_re           re.search on the title ("flags": "i" for IGNORECASE)
+    upper_re           re.search on the upper-cased title
+    stripped_re        re.search on the upper-cased, stripped title
+    upper_is           upper-cased, stripped title equals one of the values
+    upper_prefix       upper-cased title starts with the value
+    lower_contains     lower-cased title contains the value
+Actions, applied in this order:
+    split_sub          regex; split the title once and use the rest as sub
+    set                {field: value}
+    default            {field: value}, only where the field is empty
+    clear_if_shorter   {field: n}, blank the field if shorter than n chars
+    cases              ordered [{name, when, <actions>}]; the first case whose
+                       "when" holds (on the title as it was matched) also applies
+    drop               remove the activity
+
+Usage:
+    rules = RuleSet.load(path)
+    rules.apply(weeks)
+    print(rules.summary("CC rules"), file=sys.stderr)
+"""
+import json
+import re
+import time
+
+from garble_keywords import KEYWORDS
+
+CLAUSE_KEYS = ("all", "any", "none", "title_re", "upper_re", "stripped_re",
+               "upper_is", "upper_prefix", "lower_contains", "flags")
+ACTION_KEYS = ("split_sub", "set", "default", "clear_if_shorter", "cases", "drop")
+
+
+def _compile_clause(clause, where):
+    """Clause dict → test(title, upper, hits)."""
+    unknown = set(clause) - set(CLAUSE_KEYS)
+    if unknown:
+        raise ValueError(f"{where}: unknown clause key(s) {', '.join(sorted(unknown))}")
+    for key in ("all", "any", "none"):
+        missing = [kw for kw in clause.get(key, ()) if kw not in KEYWORDS.keywords]
+        if missing:
+            raise ValueError(f"{where}: keyword(s) {', '.join(missing)} missing from "
+                             f"garble_keywords.PATTERNS")
+    flags = re.IGNORECASE if 'i' in clause.get("flags", "") else 0
+    tests = []
+    if "all" in clause:
+        all_kws = frozenset(clause["all"])
+        tests.append(lambda t, u, h: all_kws <= h)
+    if "any" in clause:
+        any_kws = frozenset(clause["any"])
+        tests.append(lambda t, u, h: not any_kws.isdisjoint(h))
+    if "none" in clause:
+        none_kws = frozenset(clause["none"])
+        tests.append(lambda t, u, h: none_kws.isdisjoint(h))
+    if "title_re" in clause:
+        title_re = re.compile(clause["title_re"], flags)
+        tests.append(lambda t, u, h: title_re.search(t))
+    if "upper_re" in clause:
+        upper_re = re.compile(clause["upper_re"], flags)
+        tests.append(lambda t, u, h: upper_re.search(u))
+    if "stripped_re" in clause:
+        stripped_re = re.compile(clause["stripped_re"], flags)
+        tests.append(lambda t, u, h: stripped_re.search(u.strip()))
+    if "upper_is" in clause:
+        values = frozenset(clause["upper_is"])
+        tests.append(lambda t, u, h: u.strip() in values)
+    if "upper_prefix" in clause:
+        prefix = clause["upper_prefix"]
+        tests.append(lambda t, u, h: u.startswith(prefix))
+    if "lower_contains" in clause:
+        needle = clause["lower_contains"]
+        tests.append(lambda t, u, h: needle in t.lower())
+    if not tests:
+        raise ValueError(f"{where}: empty clause")
+    if len(tests) == 1:
+        return tests[0]
+
+    def clause_holds(t, u, h):
+        for test in tests:
+            if not test(t, u, h):
+                return False
+        return True
+    return clause_holds
+
+
+def _any_clause(clauses):
+    """test(title, upper, hits) that holds when any of the compiled clauses does."""
+    if len(clauses) == 1:
+        return clauses[0]
+
+    def any_holds(t, u, h):
+        for clause in clauses:
+            if clause(t, u, h):
+                return True
+        return False
+    return any_holds
+
+
+class Rule:
+    """One compiled rule (or case of a rule) with its hit counter and timing."""
+
+    def __init__(self, spec, where=""):
+        self.name = spec["name"]
+        where = f"{where}{self.name}"
+        unknown = set(spec) - set(ACTION_KEYS) - {"name", "when", "stop", "note"}
+        if unknown:
+            raise ValueError(f"{where}: unknown key(s) {', '.join(sorted(unknown))}")
+        self.matches = _any_clause([_compile_clause(c, where) for c in spec["when"]])
+        self.split_sub = re.compile(spec["split_sub"]) if "split_sub" in spec else None
+        self.set = spec.get("set", {})
+        self.default = spec.get("default", {})
+        self.clear_if_shorter = spec.get("clear_if_shorter", {})
+        self.cases = [Rule(c, f"{where}/") for c in spec.get("cases", ())]
+        self.drop = spec.get("drop", False)
+        self.stop = spec.get("stop", True)
+        self.hits = 0
+        self.seconds = 0.0
+
+    def apply(self, a, title, upper, hits):
+        case = next((c for c in self.cases if c.matches(title, upper, hits)), None)
+        if self.split_sub:
+            parts = self.split_sub.split(a['title'], maxsplit=1)
+            if len(parts) == 2:
+                a['sub'] = parts[1].strip()
+        for field, value in self.set.items():
+            a[field] = value
+        for field, value in self.default.items():
+            a[field] = a.get(field) or value
+        for field, n in self.clear_if_shorter.items():
+            if not a.get(field) or len(a[field]) < n:
+                a[field] = ""
+        if case:
+            case.hits += 1
+            case.apply(a, title, upper, hits)
+
+
+class RuleSet:
+    """Ordered rules applied to every activity of a week list."""
+
+    def __init__(self, specs, source="<rules>"):
+        self.source = source
+        self.rules = [Rule(spec, f"{source}: ") for spec in specs]
+        names = [r.name for r in self.rules]
+        dupes = sorted({n for n in names if names.count(n) > 1})
+        if dupes:
+            raise ValueError(f"{source}: duplicate rule name(s) {', '.join(dupes)}")
+        self.activities = 0
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["rules"], source=path)
+
+    def apply_one(self, a):
+        """Run the rules on one activity dict in place; False if it should be dropped."""
+        self.activities += 1
+        title = None
+        for rule in self.rules:
+            # Non-stopping rules may rewrite the title for the rules after them
+            if a['title'] != title:
+                title = a['title']
+                upper = title.upper()
+                hits = KEYWORDS.scan(upper)
+            t0 = time.perf_counter()
+            matched = rule.matches(title, upper, hits)
+            if matched:
+                rule.apply(a, title, upper, hits)
+            rule.seconds += time.perf_counter() - t0
+            if matched:
+                rule.hits += 1
+                if rule.drop:
+                    return False
+                if rule.stop:
+                    return True
+        return True
+
+    def apply(self, weeks):
+        for w in weeks:
+            w['activities'][:] = [a for a in w['activities'] if self.apply_one(a)]
+        return weeks
+
+    def summary(self, label="Rules"):
+        fired = sum(r.hits for r in self.rules)
+        ms = sum(r.seconds for r in self.rules) * 1000
+        dead = [r.name for r in self.rules if not r.hits]
+        line = (f"  {label}: {self.activities} activities, {fired} rule hits, {ms:.1f} ms "
+                f"({len(self.rules)} rules)")
+        if dead:
+            line += f"; never fired: {', '.join(dead)}"
+        return line
+
+    def table(self):
+        """Per-rule hit counts and match+action time, slowest first."""
+        lines = [f"    {'rule':32s} {'hits':>6s} {'ms':>8s}"]
+        for r in sorted(self.rules, key=lambda r: -r.seconds):
+            lines.append(f"    {r.name:32s} {r.hits:6d} {r.seconds * 1000:8.2f}")
+            for c in r.cases:
+                lines.append(f"      /{c.name:30s} {c.hits:6d}")
+        return "\n".join(lines)
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Delta between two schedule releases (all_data.json / cc_data.json, i.e. the
+output of extract_schedule + postprocess_cc), keyed by
+(matéria, group, week, day, turno), plus a changelog.
+
+Usage:
+    python scripts/schedule_delta.py --since HEAD            # vs the committed JSON
+    python scripts/schedule_delta.py old_all.json old_cc.json --changelog CHANGES.md
+
+The delta is written to public/data/delta.json (only if it changed):
+    {"from": <hash>, "to": <hash>, "materias": [...],
+     "groups":  [[mid, g, present], ...],                      # added/removed groups
+     "weeks":   [[mid, g, num, old_dates, new_dates], ...],   # added/removed/re-dated weeks
+     "added":   [[mid, g, num, day, turno, activity], ...],
+     "removed": [[mid, g, num, day, turno], ...],
+     "changed": [[mid, g, num, day, turno, {field: [old, new]}], ...]}
+Activity ids are positional ("{num}-{i}") and left out of the comparison;
+apply_delta() renumbers them. The changelog (Markdown) goes to stdout unless
+--changelog is given; summary lines go to stderr.
+"""
+import sys
+sys.stdout.reconfigure(encoding='utf-8')
+
+import argparse
+import gzip
+import json
+import os
+import subprocess
+
+from generate_js import (BASE_DIR, MATERIA_NAMES, SLOT_DAYS, SLOT_TURNOS, content_digest,
+                         write_modules, write_summary)
+from pdf_cache import format_bytes
+
+RELEASE_FILES = ("scripts/all_data.json", "scripts/cc_data.json")
+DELTA_PATH = os.path.join(BASE_DIR, "public", "data", "delta.json")
+FIELDS = ("title", "sub", "time", "type", "loc")
+FIELD_LABELS = {"title": "título", "sub": "sub", "time": "horário", "type": "tipo", "loc": "local"}
+
+
+def load_release(paths):
+    """{mid: {group: weeks}} merged from JSON files shaped like all_data.json."""
+    release = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            release.update(json.load(f))
+    return release
+
+
+def load_git_release(rev, paths=RELEASE_FILES):
+    """load_release() of the files as committed at rev (missing files are skipped)."""
+    release = {}
+    for path in paths:
+        proc = subprocess.run(["git", "show", f"{rev}:{path}"], cwd=BASE_DIR,
+                              capture_output=True)
+        if proc.returncode == 0:
+            release.update(json.loads(proc.stdout.decode("utf-8")))
+    return release
+
+
+def release_hash(release):
+    data = json.dumps(release, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return content_digest(data)[:12]
+
+
+def slot_key(a):
+    return (a["day"], a["turno"])
+
+
+def index_release(release, materias):
+    """({(mid, g, num): dates}, {(mid, g, num, day, turno): activity}) for the given matérias."""
+    weeks, slots = {}, {}
+    for mid in materias:
+        for g, ws in release.get(mid, {}).items():
+            for w in ws:
+                weeks[(mid, g, w["num"])] = w.get("dates", "")
+                for a in w["activities"]:
+                    slots[(mid, g, w["num"]) + slot_key(a)] = a
+    return weeks, slots
+
+
+def field_changes(old, new):
+    """{field: [old, new]} for the fields that differ (ids excluded)."""
+    fields = [f for f in FIELDS if f in old or f in new]
+    fields += sorted((set(old) | set(new)) - set(FIELDS) - {"id", "day", "turno"})
+    return {f: [old.get(f, ""), new.get(f, "")] for f in fields
+            if old.get(f, "") != new.get(f, "")}
+
+
+def sort_key(key):
+    mid, g, num, *slot = key
+    day_turno = (SLOT_DAYS.index(slot[0]), SLOT_TURNOS.index(slot[1])) if slot else ()
+    return (mid, int(g), num) + day_turno
+
+
+def compute_delta(old, new, materias=None):
+    """Delta dict (see module docstring) turning release old into release new."""
+    if materias is None:
+        materias = sorted(set(old) | set(new))
+    old_weeks, old_slots = index_release(old, materias)
+    new_weeks, new_slots = index_release(new, materias)
+    strip = lambda a: {k: v for k, v in a.items() if k not in ("id", "day", "turno")}
+    delta = {"from": release_hash({m: old.get(m) for m in materias}),
+             "to": release_hash({m: new.get(m) for m in materias}),
+             "materias": list(materias), "groups": [], "weeks": [], "added": [], "removed": [],
+             "changed": []}
+    old_groups = {(m, g) for m in materias for g in old.get(m, {})}
+    new_groups = {(m, g) for m in materias for g in new.get(m, {})}
+    for mid, g in sorted(old_groups ^ new_groups, key=lambda k: (k[0], int(k[1]))):
+        delta["groups"].append([mid, g, (mid, g) in new_groups])
+    for key in sorted(set(old_weeks) | set(new_weeks), key=sort_key):
+        before, after = old_weeks.get(key), new_weeks.get(key)
+        if before != after:
+            delta["weeks"].append([*key, before, after])
+    for key in sorted(set(old_slots) | set(new_slots), key=sort_key):
+        if key not in old_slots:
+            delta["added"].append([*key, strip(new_slots[key])])
+        elif key not in new_slots:
+            delta["removed"].append(list(key))
+        else:
+            changes = field_changes(old_slots[key], new_slots[key])
+            if changes:
+                delta["changed"].append([*key, changes])
+    return delta
+
+
+def apply_delta(release, delta):
+    """Copy of release with delta applied (weeks re-sorted, activity ids renumbered)."""
+    result = json.loads(json.dumps(release))
+    groups, weeks = set(), {}
+    for mid in delta["materias"]:
+        for g, ws in result.get(mid, {}).items():
+            groups.add((mid, g))
+            for w in ws:
+                weeks[(mid, g, w["num"])] = w
+    for mid, g, present in delta.get("groups", []):
+        if present:
+            groups.add((mid, g))
+        else:
+            groups.discard((mid, g))
+    for mid, g, num, _, dates in delta["weeks"]:
+        if dates is None:
+            continue
+        if (mid, g, num) in weeks:
+            weeks[(mid, g, num)]["dates"] = dates
+        else:
+            weeks[(mid, g, num)] = {"num": num, "dates": dates, "activities": []}
+    for mid, g, num, day, turno, *rest in delta["removed"] + delta["changed"] + delta["added"]:
+        w = weeks[(mid, g, num)]
+        slot = next((a for a in w["activities"] if slot_key(a) == (day, turno)), None)
+        if not rest:
+            w["activities"].remove(slot)
+        elif slot is None:
+            w["activities"].append({"day": day, "turno": turno, **rest[0]})
+        else:
+            for field, (_, value) in rest[0].items():
+                slot[field] = value
+    for mid, g, num, _, dates in delta["weeks"]:
+        if dates is None:
+            del weeks[(mid, g, num)]
+    for mid in delta["materias"]:
+        # Every group stays, even once its last week is gone (an empty list)
+        by_group = {g: [] for m, g in sorted(groups, key=lambda k: int(k[1])) if m == mid}
+        for (m, g, num), w in sorted(weeks.items(), key=lambda kv: sort_key(kv[0])):
+            if m != mid:
+                continue
+            w["activities"].sort(key=lambda a: (SLOT_DAYS.index(a["day"]),
+                                                SLOT_TURNOS.index(a["turno"])))
+            for i, a in enumerate(w["activities"], 1):
+                a["id"] = f"{num}-{i}"
+            by_group.setdefault(g, []).append(w)
+        if by_group:
+            result[mid] = by_group
+        else:
+            result.pop(mid, None)
+    return result
+
+
+def changelog(delta):
+    """Markdown changelog of a delta, one section per matéria and group."""
+    entries = {}
+    for mid, g, num, before, after in delta["weeks"]:
+        text = ("semana nova" if before is None else "semana removida" if after is None
+                else f"datas {before} → {after}")
+        entries.setdefault((mid, g), []).append(((num,), f"Semana {num}: {text}"))
+    for mid, g, num, day, turno, a in delta["added"]:
+        text = f"+ {a.get('title', '')}" + (f" ({a['time']})" if a.get("time") else "")
+        entries.setdefault((mid, g), []).append(((num, day, turno), text))
+    dropped = {tuple(e[:3]) for e in delta["weeks"] if e[4] is None}
+    for mid, g, num, day, turno in delta["removed"]:
+        if (mid, g, num) in dropped:
+            continue
+        entries.setdefault((mid, g), []).append(((num, day, turno), "− atividade removida"))
+    for mid, g, num, day, turno, changes in delta["changed"]:
+        text = "; ".join(f"{FIELD_LABELS.get(f, f)} \"{a}\" → \"{b}\"" for f, (a, b) in changes.items())
+        entries.setdefault((mid, g), []).append(((num, day, turno), f"~ {text}"))
+
+    lines = [f"# Mudanças no cronograma ({delta['from']} → {delta['to']})", ""]
+    if not entries:
+        lines.append("Nenhuma mudança.")
+    for (mid, g), items in sorted(entries.items(), key=lambda kv: sort_key(kv[0] + (0,))):
+        lines += [f"## {MATERIA_NAMES.get(mid, mid.upper())} — Grupo {g}", ""]
+        for where, text in sorted(items, key=lambda it: (
+                it[0][0], SLOT_DAYS.index(it[0][1]) if len(it[0]) > 1 else -1,
+                SLOT_TURNOS.index(it[0][2]) if len(it[0]) > 1 else -1)):
+            prefix = f"Semana {where[0]}, {where[1]} {where[2]}: " if len(where) > 1 else ""
+            lines.append(f"- {prefix}{text}")
+        lines.append("")
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def delta_summary(delta, new):
+    """Counts of a delta and its size against the full data of the matérias it covers."""
+    groups = {(e[0], e[1]) for k in ("groups", "weeks", "added", "removed", "changed")
+              for e in delta[k]}
+    data = json.dumps(delta, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    full = json.dumps({m: new.get(m) for m in delta["materias"]}, ensure_ascii=False,
+                      separators=(",", ":")).encode("utf-8")
+    gz = lambda d: len(gzip.compress(d, mtime=0))
+    return (f"  Delta {delta['from']} → {delta['to']}: +{len(delta['added'])} "
+            f"−{len(delta['removed'])} ~{len(delta['changed'])} activities, "
+            f"{len(delta['weeks'])} weeks in {len(groups)} groups; "
+            f"{format_bytes(len(data))} ({format_bytes(gz(data))} gzip) vs "
+            f"{format_bytes(len(full))} ({format_bytes(gz(full))} gzip) full")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delta + changelog between two schedule releases")
+    parser.add_argument('old', nargs='*', help='Previous release JSON file(s)')
+    parser.add_argument('--since', metavar='REV',
+                        help='Use the release JSON committed at REV as the previous release')
+    parser.add_argument('--new', nargs='+', metavar='PATH',
+                        default=[os.path.join(BASE_DIR, p) for p in RELEASE_FILES],
+                        help='New release JSON file(s) (default: all_data.json + cc_data.json)')
+    parser.add_argument('--materia', action='append', choices=sorted(MATERIA_NAMES),
+                        help='Only compare these matérias (repeatable)')
+    parser.add_argument('--out', default=DELTA_PATH, help='Delta JSON path')
+    parser.add_argument('--changelog', metavar='PATH', help='Write the changelog here, not stdout')
+    args = parser.parse_args()
+    if bool(args.old) == bool(args.since):
+        parser.error("give either the previous release file(s) or --since REV")
+
+    old = load_git_release(args.since) if args.since else load_release(args.old)
+    new = load_release(args.new)
+    delta = compute_delta(old, new, args.materia)
+    materias = delta["materias"]
+    if {m: apply_delta(old, delta).get(m) for m in materias} != {m: new.get(m) for m in materias}:
+        sys.exit("  [ERROR] applying the delta does not reproduce the new release")
+
+    content = json.dumps(delta, ensure_ascii=False, separators=(",", ":")) + "\n"
+    print(delta_summary(delta, new), file=sys.stderr)
+    print(write_summary(write_modules({args.out: content}), label="Delta"), file=sys.stderr)
+    log = changelog(delta)
+    if args.changelog:
+        with open(args.changelog, "w", encoding="utf-8") as f:
+            f.write(log)
+    else:
+        print(log, end="")
+
+
+if __name__ == "__main__":
+    main()
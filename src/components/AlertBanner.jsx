@@ -5,7 +5,7 @@ export default function AlertBanner({alerts, onDismiss}) {
       <div style={{display:"flex",alignItems:"center",gap:10,flexWrap:"wrap"}}>
         🔔 {alerts.map((a,i)=>(
           <span key={i} style={{background:"rgba(255,255,255,0.2)",borderRadius:8,padding:"3px 10px",fontSize:12}}>
-            {a.type==="prova"?"📝":"🎯"} {a.label} {a.diff===0?"— HOJE!":a.diff===1?"— AMANHÃ!":`— em ${a.diff} dias`}
+            {a.type==="mudanca" ? <>✏️ {a.label}</> : <>{a.type==="prova"?"📝":"🎯"} {a.label} {a.diff===0?"— HOJE!":a.diff===1?"— AMANHÃ!":`— em ${a.diff} dias`}</>}
           </span>
         ))}
       </div>
@@ -1,9 +1,9 @@
 import { useState, useEffect, useRef, useMemo, useCallback } from "react";
 import { DAYS_ORDER, DAY_LABELS, MODULE_END_DATE } from "../constants";
-import { GRUPOS, loadMateriaData } from "../scheduleData";
+import { GRUPOS, loadMateriaGroup } from "../scheduleData";
 import { supabase } from "../supabase";
 import { dbLoadProgress, dbSaveProgress, validateAcesso } from "../lib/db";
-import { getTodayInfo, getUpcomingAlerts, launchConfetti, formatTimeRemaining } from "../lib/helpers";
+import { getTodayInfo, getUpcomingAlerts, getScheduleChanges, launchConfetti, formatTimeRemaining } from "../lib/helpers";
 import { applyCustomizations, generateCustomId } from "../lib/customizations";
 
 import AlertBanner from "./AlertBanner";
@@ -22,13 +22,15 @@ function getWeekDayDate(datesStr, dayKey) {
 }
 
 export default function ScheduleView({ user, profile, materia, grupo, onBack, onChangeGrupo }) {
-  const [weeksByGroup, setWeeksByGroup] = useState(null);
-  const WEEKS     = useMemo(() => (weeksByGroup && weeksByGroup[grupo]) || [], [weeksByGroup, grupo]);
+  const [weeksByGroup, setWeeksByGroup] = useState({});
+  const WEEKS     = useMemo(() => weeksByGroup[grupo] || [], [weeksByGroup, grupo]);
   const keyEvents = useMemo(() => materia.keyEvents || [], [materia.keyEvents]);
   const weekDates = useMemo(() => materia.weekDates || [], [materia.weekDates]);
 
   const {weekNum:todayWeek, dayKey:todayDay} = useMemo(() => getTodayInfo(weekDates),  [weekDates]);
+  const [delta, setDelta] = useState(null);
   const alerts = useMemo(() => getUpcomingAlerts(keyEvents), [keyEvents]);
+  const changes = useMemo(() => getScheduleChanges(delta, materia.id, grupo), [delta, materia.id, grupo]);
 
   const ALERT_KEY = `alert_dismissed_${materia.id}`;
   const [alertDismissed, setAlertDismissed] = useState(
@@ -39,6 +41,16 @@ export default function ScheduleView({ user, profile, materia, grupo, onBack, on
     setAlertDismissed(true);
   }
 
+  // Mudanças têm o próprio "dispensar", por release: um delta novo volta a aparecer
+  const CHANGES_KEY = delta ? `changes_dismissed_${materia.id}_${grupo}_${delta.to}` : null;
+  const [changesDismissed, setChangesDismissed] = useState(null);
+  const changesHidden = !CHANGES_KEY || changesDismissed === CHANGES_KEY
+    || localStorage.getItem(CHANGES_KEY) === "1";
+  function dismissChanges() {
+    localStorage.setItem(CHANGES_KEY, "1");
+    setChangesDismissed(CHANGES_KEY);
+  }
+
   const [open, setOpen] = useState({});
   const [prevWeeks, setPrevWeeks] = useState(WEEKS);
   if (WEEKS !== prevWeeks) {
@@ -55,6 +67,8 @@ export default function ScheduleView({ user, profile, materia, grupo, onBack, on
   const [customizations, setCustomizations] = useState({});
   const [loading,        setLoading]        = useState(true);
   const [accessDenied,   setAccessDenied]   = useState(false);
+  const [loadError,      setLoadError]      = useState(null); // grupo cujo download falhou (rede, chunk antigo)
+  const [loadAttempt,    setLoadAttempt]    = useState(0);
   const [syncStatus,     setSyncStatus]     = useState("idle");
   const [accessStatus,   setAccessStatus]   = useState(null); // "aprovado", "trial", etc
   const [trialExpiresAt, setTrialExpiresAt] = useState(null);
@@ -94,8 +108,7 @@ export default function ScheduleView({ user, profile, materia, grupo, onBack, on
     Promise.all([
       validateAcesso(user.id, materia.id, !!profile?.is_vip),
       dbLoadProgress(user.id, materia.id),
-      loadMateriaData(materia.id),
-    ]).then(([acesso, {completed:c, notes:n, customizations:cust}, wbg]) => {
+    ]).then(([acesso, {completed:c, notes:n, customizations:cust}]) => {
       if (cancelled) return;
       if (!acesso && !isVIP) {
         setAccessDenied(true); setLoading(false); return;
@@ -104,7 +117,6 @@ export default function ScheduleView({ user, profile, materia, grupo, onBack, on
         setAccessStatus(acesso.status);
         if (acesso.trial_expires_at) setTrialExpiresAt(new Date(acesso.trial_expires_at));
       }
-      setWeeksByGroup(wbg);
       setCompleted(c); setNotes(n); setCustomizations(cust || {});
       setLoading(false);
     }).catch(() => {
@@ -116,6 +128,28 @@ export default function ScheduleView({ user, profile, materia, grupo, onBack, on
     };
   },[user.id, materia.id, isVIP, profile?.is_vip]);
 
+  // Group schedules are fetched on first view (lazy hubs download only that group)
+  useEffect(()=>{
+    if (weeksByGroup[grupo]) return;
+    let cancelled = false;
+    loadMateriaGroup(materia.id, grupo).then(weeks => {
+      if (!cancelled) setWeeksByGroup(prev => ({ ...prev, [grupo]: weeks || [] }));
+    }).catch(() => {
+      if (!cancelled) setLoadError(grupo);
+    });
+    return () => { cancelled = true; };
+  },[materia.id, grupo, weeksByGroup, loadAttempt]);
+
+  // Mudanças da última atualização do cronograma (opcional: sem delta.json, nada aparece)
+  useEffect(()=>{
+    let cancelled = false;
+    fetch("/data/delta.json")
+      .then(r => r.ok ? r.json() : null)
+      .then(d => { if (!cancelled) setDelta(d); })
+      .catch(() => {});
+    return () => { cancelled = true; };
+  },[]);
+
   // Debounced auto-save: saves when dirty flag is set
   useEffect(() => {
     if (!dirty) return;
@@ -241,7 +275,7 @@ useEffect(()=>{
   const totalDone = useMemo(() => allItems.filter(a => completed[a.id]).length, [allItems, completed]);
   const pct       = allItems.length ? Math.round((totalDone / allItems.length) * 100) : 0;
 
-  if (loading) return (
+  if (loading || (!weeksByGroup[grupo] && loadError !== grupo)) return (
     <div style={{display:"flex",alignItems:"center",justifyContent:"center",height:"100vh",color:"var(--text-faint)",fontSize:15,gap:10,background:"var(--bg-page)"}}>
       <span style={{fontSize:28}}>{materia.icon}</span> Carregando cronograma…
     </div>
@@ -266,9 +300,20 @@ useEffect(()=>{
     </div>
   );
 
+  if (!weeksByGroup[grupo]) return (
+    <div style={{display:"flex",flexDirection:"column",alignItems:"center",justifyContent:"center",height:"100vh",gap:16,color:"var(--text-faint)",textAlign:"center",padding:24,background:"var(--bg-page)"}}>
+      <span style={{fontSize:48}}>📡</span>
+      <div style={{fontSize:18,fontWeight:700,color:"var(--text-primary)"}}>Não foi possível carregar o cronograma</div>
+      <div style={{fontSize:14}}>Verifique sua conexão e tente novamente.</div>
+      <button className="btn btn-dark" onClick={() => { setLoadError(null); setLoadAttempt(n => n + 1); }}>Tentar novamente</button>
+      <button className="btn btn-dark" onClick={onBack}>← Voltar ao painel</button>
+    </div>
+  );
+
   return (
     <div style={{minHeight:"100vh",background:"var(--bg-page)",color:"var(--text-primary)"}}>
       {!alertDismissed && <AlertBanner alerts={alerts} onDismiss={dismissAlert}/>}
+      {!changesHidden && <AlertBanner alerts={changes} onDismiss={dismissChanges}/>}
 
       <div className="schedule-header" style={{background:"var(--bg-header)",borderBottom:"1px solid #1E293B",padding:"14px 20px",position:"sticky",top:0,zIndex:100}}>
         <div style={{maxWidth:1200,margin:"0 auto"}}>
@@ -45,6 +45,21 @@ export function getUpcomingAlerts(keyEvents) {
     .map(e    => ({...e, diff: Math.ceil((e.date - today) / 86400000)}));
 }
 
+// Mudanças do último delta (public/data/delta.json, scripts/schedule_delta.py) no grupo
+export function getScheduleChanges(delta, materiaId, grupo) {
+  if (!delta) return [];
+  const mine = e => e[0] === materiaId && e[1] === String(grupo);
+  const gone = new Set((delta.weeks || []).filter(e => mine(e) && e[4] == null).map(e => e[2]));
+  const slot = (e, text) => ({type:"mudanca", label:`Sem ${e[2]} · ${e[3]} ${e[4]}: ${text}`});
+  return [
+    ...(delta.weeks   || []).filter(mine).map(e => ({type:"mudanca",
+      label:`Sem ${e[2]}: ${e[4] == null ? "removida" : e[3] == null ? "nova" : `datas ${e[4]}`}`})),
+    ...(delta.added   || []).filter(mine).map(e => slot(e, `nova — ${e[5].title}`)),
+    ...(delta.removed || []).filter(e => mine(e) && !gone.has(e[2])).map(e => slot(e, "removida")),
+    ...(delta.changed || []).filter(mine).map(e => slot(e, e[5].title ? e[5].title[1] : "alterada")),
+  ];
+}
+
 export function launchConfetti() {
   const canvas = document.createElement("canvas");
   canvas.style.cssText = "position:fixed;top:0;left:0;width:100%;height:100%;pointer-events:none;z-index:9999";
@@ -15,24 +15,24 @@ function inferType(a) {
   return a.type;
 }
 
+// Day-major (day, turno) order of the week "slots" index emitted by generate_js.py
+const SLOT_KEYS = ["2ª","3ª","4ª","5ª","6ª","Sáb"].flatMap(d => [[d, "Manhã"], [d, "Tarde"]]);
+
 function preProcess(weeks) {
   return weeks.map(w => {
     const dayMap = {};
     ["2ª","3ª","4ª","5ª","6ª","Sáb"].forEach(d => { dayMap[d] = {Manhã:[], Tarde:[]}; });
+    if (w.slots) {
+      // Precomputed at build time: activities already carry effectiveType
+      w.slots.forEach((idx, s) => { dayMap[SLOT_KEYS[s][0]][SLOT_KEYS[s][1]] = idx.map(i => w.activities[i]); });
+      return { ...w, dayMap };
+    }
     const activities = w.activities.map(a => ({ ...a, effectiveType: inferType(a) }));
     activities.forEach(a => { if (dayMap[a.day]) dayMap[a.day][a.turno].push(a); });
     return { ...w, activities, dayMap };
   });
 }
 
-function buildWeeksByGroup(byGroupRaw) {
-  const result = {};
-  for (const [g, weeks] of Object.entries(byGroupRaw)) {
-    result[g] = preProcess(weeks);
-  }
-  return result;
-}
-
 // ─── PED GRUPO 6 (manual — sem PDF disponível) ──────────────────────────────
 const PED_G6_RAW = [
   {num:1,dates:"23/2 – 28/2",activities:[
@@ -156,27 +156,38 @@ const PED_G6_RAW = [
 ];
 
 // ─── LAZY DATA LOADING (code splitting) ────────────────────────────────────
-const dataCache = {};
+const groupCache = {};
 
-export async function loadMateriaData(id) {
-  if (dataCache[id]) return dataCache[id];
-  let raw;
+// Hub module of a matéria: either {ID}_BY_GROUP (static hub) or, for hubs
+// generated with `generate_js.py --layout lazy`, loadGroup(g) / loadAllGroups()
+function importHub(id) {
   switch (id) {
-    case "cm":  raw = (await import("./data/cm")).CM_BY_GROUP; break;
-    case "go":  raw = (await import("./data/go")).GO_BY_GROUP; break;
-    case "ped": {
-      const parsed = (await import("./data/ped")).PED_BY_GROUP;
-      raw = { ...parsed, 6: PED_G6_RAW };
-      break;
-    }
-    case "cc":  raw = (await import("./data/cc")).CC_BY_GROUP; break;
-    case "sim": raw = (await import("./data/sim")).SIM_BY_GROUP; break;
-    case "emg": raw = (await import("./data/emg")).EMG_BY_GROUP; break;
-    case "ubs": raw = (await import("./data/ubs")).UBS_BY_GROUP; break;
-    default: return null;
+    case "cm":  return import("./data/cm");
+    case "go":  return import("./data/go");
+    case "ped": return import("./data/ped");
+    case "cc":  return import("./data/cc");
+    case "sim": return import("./data/sim");
+    case "emg": return import("./data/emg");
+    case "ubs": return import("./data/ubs");
+    default:    return Promise.resolve(null);
+  }
+}
+
+// One group's weeks; with a lazy hub only that group's module is downloaded
+export async function loadMateriaGroup(id, g) {
+  const key = `${id}:${g}`;
+  if (groupCache[key]) return groupCache[key];
+  let weeks;
+  if (id === "ped" && Number(g) === 6) {
+    weeks = PED_G6_RAW;
+  } else {
+    const hub = await importHub(id);
+    if (!hub) return null;
+    weeks = hub.loadGroup ? await hub.loadGroup(g) : hub[`${id.toUpperCase()}_BY_GROUP`]?.[g];
   }
-  dataCache[id] = buildWeeksByGroup(raw);
-  return dataCache[id];
+  if (!weeks) return null;
+  groupCache[key] = preProcess(weeks);
+  return groupCache[key];
 }
 
 // ─── KEY EVENTS & WEEK DATES (shared across all matérias) ────────────────────